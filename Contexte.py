@@ -1,7 +1,15 @@
 import streamlit as st
-from app.utils import load_data, get_kpis
+from app.utils import (
+    EXACT_KPI_MAX_ROWS,
+    load_data,
+    get_kpis,
+    load_kpi_sketches,
+    load_csv_bytes,
+)
+from app.perf_panel import begin_page, render_perf_panel
 
 st.set_page_config(page_title="Contexte & Données", page_icon="📦")
+begin_page()
 
 st.markdown(
     """
@@ -49,7 +57,11 @@ st.markdown(
 )
 
 df = load_data()
-kpis = get_kpis(df)
+# Comptages exacts sur une table de taille raisonnable, sketches au-delà
+sketches = load_kpi_sketches() if len(df) > EXACT_KPI_MAX_ROWS else None
+kpis = get_kpis(df, sketches=sketches)
+# Les distincts estimés sont marqués « ≈ »
+approx = "≈ " if kpis["approche"] else ""
 
 # Titre & intro
 st.title("Analyse & Prédiction des ventes")
@@ -66,8 +78,10 @@ st.markdown("Ce jeu de données couvre une période de 2 ans (mars 2022 - févri
 # KPIs clés
 col1, col2, col3 = st.columns(3)
 col1.metric("Transactions", f"{kpis['transactions']:,}")
-col2.metric("Produits uniques", kpis["produits_uniques"])
-col3.metric("Clients", kpis["clients"])
+col2.metric("Produits uniques", f"{approx}{kpis['produits_uniques']:,}")
+col3.metric("Clients", f"{approx}{kpis['clients']:,}")
+if kpis["approche"]:
+    st.caption("≈ : nombres distincts estimés (HyperLogLog, erreur typique ~0,8 %)")
 
 col4, col5 = st.columns(2)
 col4.metric("Chiffre d'affaires total (€)", f"{kpis['revenu_total']:,.2f}")
@@ -83,6 +97,8 @@ st.markdown(
 )
 st.download_button(
     "📥 Télécharger les données",
-    data=df.to_csv(index=False),
+    data=load_csv_bytes(),
     file_name="sales_transactions.csv",
 )
+
+render_perf_panel()
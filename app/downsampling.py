@@ -0,0 +1,94 @@
+"""
+Sous-échantillonnage des séries temporelles avant envoi au navigateur.
+
+LTTB (Largest-Triangle-Three-Buckets) conserve la forme visuelle de la
+courbe (pics, creux) tout en bornant le nombre de points transmis.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Nombre maximal de points par courbe envoyés au navigateur
+MAX_POINTS = 2000
+# Au-delà de ce nombre de points, les traces passent en WebGL (Scattergl)
+WEBGL_THRESHOLD = 1000
+
+
+def _as_numeric(x):
+    """Axe x numérique (les dates sont converties en nanosecondes)."""
+    x = pd.Series(x)
+    if pd.api.types.is_numeric_dtype(x):
+        return x.to_numpy(dtype=float)
+    return pd.to_datetime(x).to_numpy().astype("datetime64[ns]").astype(np.int64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices des points retenus par LTTB.
+
+    Args:
+        x (array): abscisses triées (numériques)
+        y (array): ordonnées
+        n_out (int): nombre de points souhaités (>= 3)
+
+    Returns:
+        np.ndarray: indices croissants, premier et dernier point inclus
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Découpage des points intérieurs en n_out - 2 paquets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Point "suivant" : moyenne du paquet suivant (ou dernier point)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Aire du triangle (point retenu précédent, candidat, moyenne suivante)
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample_frame(df, x, y_cols, group=None, max_points=MAX_POINTS, x_range=None):
+    """
+    Restreint `df` à la fenêtre `x_range` puis applique LTTB par groupe.
+
+    Le nombre de points de chaque groupe est borné par `max_points`, quelle que
+    soit la longueur de l'historique. Les points retenus sont l'union des
+    points LTTB de chaque colonne de `y_cols`.
+    """
+    if x_range is not None:
+        xs = _as_numeric(df[x])
+        low, high = _as_numeric(pd.Series(list(x_range)))
+        df = df[(xs >= low) & (xs <= high)]
+
+    groups = [df] if group is None else [g for _, g in df.groupby(group, sort=False)]
+    kept = []
+    for g in groups:
+        if len(g) <= max_points:
+            kept.append(g)
+            continue
+        g = g.sort_values(x)
+        xs = _as_numeric(g[x])
+        per_col = max(3, max_points // len(y_cols))
+        idx = np.unique(
+            np.concatenate([lttb_indices(xs, g[c], per_col) for c in y_cols])
+        )
+        kept.append(g.iloc[idx])
+
+    return pd.concat(kept) if kept else df
@@ -1,25 +1,48 @@
-import plotly.express as px
 import streamlit as st
 import plotly.graph_objects as go
-import networkx as nx
-import matplotlib.cm as cm
+from app.downsampling import MAX_POINTS, WEBGL_THRESHOLD, downsample_frame
+from src.instrumentation import span
 
 
-def plot_seasonality(seasonality_df):
+def show_chart(fig):
+    """st.plotly_chart, mesuré (la sérialisation Plotly a lieu ici)."""
+    with span("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
 
+
+def plot_seasonality(seasonality_df, x_range=None, max_points=MAX_POINTS):
+    # Au-delà de `max_points` par famille, sous-échantillonnage LTTB + WebGL
+    n_points = seasonality_df.groupby("family").size().max()
+    seasonality_df = downsample_frame(
+        seasonality_df,
+        "month",
+        ["quantity"],
+        group="family",
+        max_points=max_points,
+        x_range=x_range,
+    )
+
+    import plotly.express as px
+
+    # Estimation sur échantillon : intervalle de confiance en barres d'erreur
+    error_y = "quantity_err" if "quantity_err" in seasonality_df else None
     fig = px.line(
         seasonality_df,
         x="month",
         y="quantity",
+        error_y=error_y,
         color="family",
-        markers=True,
+        markers=n_points <= WEBGL_THRESHOLD,
+        render_mode="webgl" if n_points > WEBGL_THRESHOLD else "svg",
         title="Évolution mensuelle des ventes par famille",
     )
     fig.update_layout(xaxis_title="Mois", yaxis_title="Quantité vendue")
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
 
 
 def plot_family_distribution(grouped_df, selected_families):
+    import plotly.express as px
+
     n = len(selected_families)
     cols = st.columns(n)
 
@@ -39,15 +62,27 @@ def plot_family_distribution(grouped_df, selected_families):
 
         with cols[i]:
             st.subheader(f"Répartition – {fam}")
-            fig = px.bar(fam_data, x="product_label", y="quantity", title=None)
+            fig = px.bar(
+                fam_data,
+                x="product_label",
+                y="quantity",
+                error_y="quantity_err" if "quantity_err" in fam_data else None,
+                title=None,
+            )
             fig.update_layout(
                 xaxis_title=None, yaxis_title="Quantité", margin=dict(t=10)
             )
-            st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
 
 
 def plot_predictions_vs_truth(
-    df_eval, y_col="quantity", pred_col="prediction", family_name=None
+    df_eval,
+    y_col="quantity",
+    pred_col="prediction",
+    family_name=None,
+    x_range=None,
+    max_points=MAX_POINTS,
+    band_cols=("p10", "p90"),
 ):
     """
     Affiche la courbe des prédictions vs vérité terrain (valeurs réelles).
@@ -57,21 +92,63 @@ def plot_predictions_vs_truth(
         y_col (str): Nom de la colonne des valeurs réelles
         pred_col (str): Nom de la colonne des prédictions
         family_name (str): Nom affiché dans le titre du graphe
+        x_range (tuple): Fenêtre de dates affichée (zoom), None = tout
+        max_points (int): Nombre maximal de points envoyés par courbe
+        band_cols (tuple): Bornes basse/haute de l'intervalle de prévision,
+            affichées en bande si présentes dans df_eval
     """
+    n_points = len(df_eval)
+    with_band = all(col in df_eval.columns for col in band_cols)
+    df_eval = downsample_frame(
+        df_eval.sort_values("date"),
+        "date",
+        [y_col, pred_col, *(band_cols if with_band else [])],
+        max_points=max_points,
+        x_range=x_range,
+    )
+
+    # Au-delà du seuil, rendu WebGL et lignes seules (pas de marqueurs)
+    large = n_points > WEBGL_THRESHOLD
+    trace = go.Scattergl if large else go.Scatter
+    mode = "lines" if large else "lines+markers"
+
     fig = go.Figure()
+    if with_band:
+        lower, upper = band_cols
+        fig.add_trace(
+            trace(
+                x=df_eval["date"],
+                y=df_eval[upper],
+                mode="lines",
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+        fig.add_trace(
+            trace(
+                x=df_eval["date"],
+                y=df_eval[lower],
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor="rgba(99, 110, 250, 0.2)",
+                name=f"Intervalle {lower.upper()}–{upper.upper()}",
+            )
+        )
     fig.add_trace(
-        go.Scatter(
+        trace(
             x=df_eval["date"],
             y=df_eval[y_col],
-            mode="lines+markers",
+            mode=mode,
             name="Ventes réelles",
         )
     )
     fig.add_trace(
-        go.Scatter(
+        trace(
             x=df_eval["date"],
             y=df_eval[pred_col],
-            mode="lines+markers",
+            mode=mode,
             name="Prévisions modèle",
         )
     )
@@ -88,8 +165,107 @@ def plot_predictions_vs_truth(
     return fig
 
 
+# Regroupement des features XGBoost pour l'affichage des contributions
+CONTRIBUTION_GROUPS = {
+    "Saisonnalité (mois, semaine)": ["month", "week"],
+    "Tendance (année)": ["year"],
+    "Remise moyenne": ["avg_discount"],
+    "Promo en ligne": ["is_promo_online"],
+    "Promo magasin": ["is_promo_store"],
+}
+
+
+def plot_contributions(contrib_df, family_name=None, groups=CONTRIBUTION_GROUPS):
+    """
+    Contributions des features à chaque prévision XGBoost, en barres empilées
+    autour du niveau de base ; la prévision (somme) est tracée par-dessus.
+
+    Args:
+        contrib_df (DataFrame): sortie de `explain_xgboost`
+            ['date', features..., 'bias', 'prediction']
+        groups (dict): libellé -> features additionnées sous ce libellé
+    """
+    fig = go.Figure()
+    for label, columns in groups.items():
+        columns = [col for col in columns if col in contrib_df.columns]
+        if columns:
+            fig.add_trace(
+                go.Bar(
+                    x=contrib_df["date"], y=contrib_df[columns].sum(axis=1), name=label
+                )
+            )
+    fig.add_trace(
+        go.Scatter(
+            x=contrib_df["date"],
+            y=contrib_df["prediction"] - contrib_df["bias"],
+            mode="lines+markers",
+            name="Écart de la prévision au niveau de base",
+            line=dict(color="black"),
+        )
+    )
+
+    base = contrib_df["bias"].iloc[0] if len(contrib_df) else 0
+    fig.update_layout(
+        barmode="relative",
+        title=f"Contributions aux prévisions – {family_name}"
+        if family_name
+        else "Contributions aux prévisions",
+        xaxis_title="Date",
+        yaxis_title=f"Contribution (quantité, base = {base:,.0f})",
+        template="plotly_white",
+    )
+    return fig
+
+
+def plot_models_vs_truth(
+    df_eval, y_col="quantity", pred_col="prediction", family_name=None
+):
+    """
+    Superpose les ventes réelles et les prévisions de plusieurs modèles.
+
+    Args:
+        df_eval (DataFrame): table longue ['date', 'model', y_col, pred_col]
+    """
+    truth = df_eval.drop_duplicates("date").sort_values("date")
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=truth["date"],
+            y=truth[y_col],
+            mode="lines+markers",
+            name="Ventes réelles",
+            line=dict(color="black", width=3),
+        )
+    )
+    for model, model_eval in df_eval.groupby("model", sort=False):
+        model_eval = model_eval.sort_values("date")
+        fig.add_trace(
+            go.Scatter(
+                x=model_eval["date"],
+                y=model_eval[pred_col],
+                mode="lines+markers",
+                name=f"Prévisions {model}",
+            )
+        )
+
+    fig.update_layout(
+        title=f"Comparaison des modèles – {family_name}"
+        if family_name
+        else "Comparaison des modèles",
+        xaxis_title="Date",
+        yaxis_title="Quantité",
+        template="plotly_white",
+    )
+    return fig
+
+
 def plot_product_graph(G, color_map=None):
-    pos = nx.spring_layout(G, seed=42)
+    # Imports locaux : networkx et matplotlib ne servent qu'à ce graphe
+    import networkx as nx
+    from matplotlib import colormaps
+
+    with span("spring_layout"):
+        pos = nx.spring_layout(G, seed=42)
 
     # Edges
     edge_x = []
@@ -116,7 +292,9 @@ def plot_product_graph(G, color_map=None):
     communities = sorted(set(color_map.values())) if color_map else [0]
 
     # Using 'Set1' for distinct colors
-    colormap = cm.get_cmap("Set1", len(communities))  # Using Set1 for better contrast
+    colormap = colormaps["Set1"].resampled(
+        len(communities)
+    )  # Using Set1 for better contrast
     color_lookup = {
         com: f"rgba{tuple(int(255 * c) for c in colormap(i)[:3]) + (0.9,)}"
         for i, com in enumerate(communities)
@@ -0,0 +1,50 @@
+import pandas as pd
+import streamlit as st
+from src.instrumentation import current_collector, env_enabled, start_run
+
+
+def begin_page():
+    """
+    Démarre la collecte des mesures pour cette exécution de la page.
+    Active si SALES_PERF=1 ou si l'URL contient ?perf=1.
+    """
+    enabled = env_enabled() or st.query_params.get("perf") == "1"
+    return start_run(enabled=enabled)
+
+
+def render_perf_panel():
+    """Affiche les mesures de l'exécution en cours dans la barre latérale."""
+    collector = current_collector()
+    if collector is None:
+        return
+
+    records = pd.DataFrame(
+        collector.records,
+        columns=["name", "start_ms", "duration_ms", "peak_mb", "cache"],
+    )
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.caption(f"{len(records)} étapes mesurées sur cette exécution")
+        st.dataframe(
+            records.drop(columns="start_ms").rename(
+                columns={
+                    "name": "Étape",
+                    "duration_ms": "Durée (ms)",
+                    "peak_mb": "Pic (Mo)",
+                    "cache": "Cache",
+                }
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+        st.download_button(
+            "Exporter (JSON)",
+            collector.to_json(),
+            file_name="perf.json",
+            mime="application/json",
+        )
+        st.download_button(
+            "Exporter (Chrome trace)",
+            collector.to_chrome_trace(),
+            file_name="perf_trace.json",
+            mime="application/json",
+        )
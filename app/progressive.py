@@ -0,0 +1,53 @@
+import streamlit as st
+
+# Mode approché activé par défaut à partir de cette taille de table
+APPROXIMATE_MIN_ROWS = 1_000_000
+# Intervalle de rafraîchissement tant que le résultat exact n'est pas prêt
+REFRESH_SECONDS = 0.5
+
+
+def approximate_toggle(df):
+    """Choix du mode approché (barre latérale), activé d'office sur les grosses tables."""
+    return st.sidebar.toggle(
+        "⚡ Mode approché (échantillon)",
+        value=len(df) >= APPROXIMATE_MIN_ROWS,
+        help="Réponse immédiate sur un échantillon, affinée jusqu'au calcul exact.",
+    )
+
+
+def approximate_caption(fraction, detail="barres : intervalle de confiance à 95 %"):
+    return f"⚡ Estimation sur un échantillon de {fraction:.0%} ({detail})"
+
+
+def show_progressive(result, render, clear=None):
+    """
+    Affiche le meilleur niveau disponible d'un `ProgressiveResult`
+    (src/sampling.py) avec `render(valeur, fraction)`, puis le remplace sur
+    place à chaque niveau plus fin, jusqu'au résultat exact (fraction None).
+
+    Si un niveau échoue, le dernier niveau calculé reste affiché avec
+    l'erreur, sans rafraîchissement, et `clear` (ex.
+    `get_progressive_seasonality.clear`) retire le résultat du cache : la
+    prochaine requête relance le calcul.
+    """
+    value, fraction = result.latest()
+    if fraction is None:
+        render(value, None)
+        return
+    if result.error is not None:
+        render(value, fraction)
+        st.error(f"Calcul exact interrompu : {result.error}")
+        if clear is not None:
+            clear()
+        return
+
+    @st.experimental_fragment(run_every=REFRESH_SECONDS)
+    def refresh():
+        value, latest = result.latest()
+        if latest is None or result.error is not None:
+            # Exact ou échec : une dernière exécution complète, sans rafraîchissement
+            st.rerun()
+        render(value, latest)
+        st.caption("⏳ Calcul exact en cours…")
+
+    refresh()
@@ -1,53 +1,280 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import urllib.request
+import numpy as np
 import pandas as pd
 import os
-import joblib
 import streamlit as st
-from prophet.serialize import model_from_json
-from src.modeling import prepare_aggregated
+from src.aggregate_cache import cached_prepare_aggregated, file_fingerprint
+from src.evaluation import LEADERBOARD_PATH, load_leaderboard
+from src.instrumentation import cached_stage, propagate, stage
+from src.kpis import build_kpi_sketches, merge_kpi_sketches
+from src.sampling import (
+    BasketSampler,
+    StratifiedSampler,
+    progressive_cooccurrence,
+    progressive_family_distribution,
+    progressive_seasonality,
+)
+from src.modeling import (
+    explain_xgboost,
+    load_saved_model,
+    load_saved_prophet_model,
+    model_exists,
+    model_signature,
+    predict_with_naive,
+    predict_with_prophet,
+    predict_with_xgboost,
+    predict_with_xgboost_quantiles,
+)
+
+# URL du service de prévision (src/forecast_service.py) ; sinon calcul local
+FORECAST_SERVICE_URL = os.environ.get("FORECAST_SERVICE_URL")
+# Au-delà, les distincts des KPIs sont estimés par les sketches HyperLogLog
+EXACT_KPI_MAX_ROWS = 1_000_000
+
+
+@cached_stage(st.cache_resource, "load_data")
+def _load_shared_table(path):
+    return pd.read_csv(path, engine="pyarrow", dtype_backend="pyarrow")
 
 
-@st.cache_data
 def load_data(path="data/raw/transactions.csv"):
-    """Charge les données depuis un fichier CSV avec cache."""
-    return pd.read_csv(path)
+    """
+    Charge les données depuis un fichier CSV, en colonnes Arrow.
+
+    Une seule instance est partagée par toutes les sessions : le DataFrame
+    renvoyé est en lecture seule (filtrer ou dériver des colonnes à part,
+    ne jamais le modifier en place).
+    """
+    # Appel positionnel : load_data() et load_data(path) partagent l'entrée du cache
+    return _load_shared_table(path)
+
+
+@cached_stage(st.cache_resource, "load_csv_bytes")
+def load_csv_bytes(path="data/raw/transactions.csv"):
+    """Contenu brut du fichier CSV, pour le bouton de téléchargement."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@cached_stage(st.cache_resource, "load_kpi_sketches")
+def load_kpi_sketches(path="data/raw/transactions.csv", by="family"):
+    """Résumés de KPIs par partition, calculés une seule fois par fichier."""
+    return build_kpi_sketches(load_data(path), by=by)
+
+
+@cached_stage(st.cache_resource, "load_sales_sampler")
+def load_sales_sampler(path="data/raw/transactions.csv"):
+    """Strates famille x semaine et ordre aléatoire des lignes (mode approché)."""
+    return StratifiedSampler(load_data(path))
+
+
+@cached_stage(st.cache_resource, "load_basket_sampler")
+def load_basket_sampler(path="data/raw/transactions.csv"):
+    """Tirage aléatoire des paniers (mode approché du graphe de co-achats)."""
+    return BasketSampler(load_data(path))
+
 
+@st.cache_resource(show_spinner=False)
+def get_progressive_seasonality(families, path="data/raw/transactions.csv"):
+    """Saisonnalité estimée puis exacte, partagée par les sessions (familles : tuple)."""
+    return progressive_seasonality(load_sales_sampler(path), list(families))
+
+
+@st.cache_resource(show_spinner=False)
+def get_progressive_distribution(families, path="data/raw/transactions.csv"):
+    """Répartition par produit estimée puis exacte (familles : tuple)."""
+    return progressive_family_distribution(load_sales_sampler(path), list(families))
+
+
+@st.cache_resource(show_spinner=False)
+def get_progressive_cooccurrence(
+    products, min_edge_weight, path="data/raw/transactions.csv"
+):
+    """Graphe de co-achats des produits `products` (tuple), estimé puis exact."""
+    df = load_data(path)
+    rows = np.flatnonzero(
+        df["product_label"].isin(list(products)).to_numpy(dtype=bool, na_value=False)
+    )
+    return progressive_cooccurrence(load_basket_sampler(path), rows, min_edge_weight)
+
+
+def get_kpis(df, sketches=None, partitions=None):
+    """
+    Retourne les KPIs principaux à partir du DataFrame transactions.
+
+    Si `sketches` est fourni (voir `load_kpi_sketches`), les KPIs sont obtenus
+    par fusion des résumés des `partitions` demandées (toutes par défaut),
+    avec des distincts approchés (clé "approche" vraie). Sinon, calcul exact
+    sur `df`.
+    """
+    if sketches is not None:
+        keys = partitions if partitions is not None else list(sketches)
+        return merge_kpi_sketches(sketches[k] for k in keys).to_kpis()
 
-def get_kpis(df):
-    """Retourne les KPIs principaux à partir du DataFrame transactions."""
     kpis = {
         "transactions": len(df),
         "produits_uniques": df["product_id"].nunique(),
         "clients": df["client_id"].nunique(),
         "revenu_total": df["revenue"].sum(),
         "quantite_totale": df["quantity"].sum(),
+        "approche": False,
     }
     return kpis
 
 
 def load_model(model_name: str, family: str):
-    model_key = f"model_{model_name.lower()}_{family.lower()}"
-    model_path = os.path.join("models", f"{model_key}.pkl")
-
-    if not os.path.exists(model_path):
-        st.error(f"Modèle introuvable : {model_path}")
+    if not model_exists(model_name, family):
+        st.error(f"Modèle introuvable : {model_name} / {family}")
         st.stop()
 
-    return joblib.load(model_path)
+    return load_saved_model(model_name, family)
 
 
 def load_prophet_model(family, path_dir="models"):
     """
-    Charge un modèle Prophet depuis un fichier .json
+    Charge un modèle Prophet (bundle, sinon ancien fichier .json)
     """
-    filename = f"model_prophet_{family.lower()}.json"
-    path = os.path.join(path_dir, filename)
-    with open(path, "r") as fin:
-        return model_from_json(fin.read())
+    return load_saved_prophet_model(family, path_dir)
 
 
+@stage("load_all_data")
 def load_all_data():
-    df_train_raw = load_data("data/processed/clean_transactions.csv")
-    df_train = prepare_aggregated(df_train_raw)
-    df_test_raw = load_data("data/processed/clean_transactions_test.csv")
-    df_test = prepare_aggregated(df_test_raw)
+    """Agrégats hebdomadaires train/test, lus depuis le cache disque si possible."""
+    df_train = cached_prepare_aggregated("data/processed/clean_transactions.csv")
+    df_test = cached_prepare_aggregated("data/processed/clean_transactions_test.csv")
     return df_train, df_test
+
+
+@cached_stage(st.cache_data, "load_leaderboard")
+def _load_leaderboard(path, fingerprint):
+    return load_leaderboard(path)
+
+
+def get_leaderboard(path=LEADERBOARD_PATH):
+    """
+    Leaderboard précalculé (python -m src.evaluation), ou None.
+
+    Le cache est indexé par l'empreinte du fichier : un leaderboard recalculé
+    est relu à la requête suivante.
+    """
+    if not os.path.exists(path):
+        return None
+    return _load_leaderboard(path, file_fingerprint(path))
+
+
+@stage("request_forecast")
+def request_forecast(model_key, family, horizon, url=None, intervals=False):
+    """
+    Demande une prévision au service local de prévision.
+
+    Returns:
+        DataFrame: colonnes ['date', 'prediction'], comme les predict_with_*,
+        plus ['p10', 'p50', 'p90'] si `intervals`
+    """
+    url = (url or FORECAST_SERVICE_URL).rstrip("/")
+    payload = {"family": family, "model": model_key, "horizon": horizon}
+    if intervals:
+        payload["intervals"] = True
+    request = urllib.request.Request(
+        f"{url}/forecast",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        forecast = pd.DataFrame(json.load(response)["forecast"])
+    forecast["date"] = pd.to_datetime(forecast["date"])
+    return forecast
+
+
+MODEL_KEYS = ["naive", "xgboost", "prophet"]
+
+
+def load_forecast_model(model_key, family):
+    """Charge le modèle nécessaire à `forecast` (None pour le modèle naïf)."""
+    if model_key == "xgboost":
+        return load_model("xgboost", family)
+    if model_key == "prophet":
+        return load_prophet_model(family)
+    return None
+
+
+def load_quantile_model(family):
+    """Booster XGBoost multi-quantiles, ou None s'il n'a pas été entraîné."""
+    if not model_exists("xgboost_quantile", family):
+        return None
+    return load_saved_model("xgboost_quantile", family)
+
+
+@cached_stage(st.cache_data, "explain_forecast")
+def _explain_forecast(family, horizon, last_date, signature, _model, _df_train_family):
+    return explain_xgboost(_model, horizon, _df_train_family, family)
+
+
+def explain_forecast(family, horizon, df_train_family, model):
+    """
+    Contributions des features aux prévisions XGBoost (voir `explain_xgboost`),
+    gardées en cache par famille, horizon, dernière date d'historique et
+    version du modèle.
+    """
+    last_date = pd.to_datetime(df_train_family["date"]).max()
+    # Arguments "_" passés par nom : exclus de la clé du cache (le modèle y est
+    # représenté par son empreinte, l'historique par sa dernière date)
+    return _explain_forecast(
+        family,
+        horizon,
+        last_date,
+        model_signature("xgboost", family),
+        _model=model,
+        _df_train_family=df_train_family,
+    )
+
+
+@stage("forecast")
+def forecast(model_key, family, horizon, df_train_family, model=None, intervals=False):
+    """
+    Prévision d'une famille avec le modèle `model_key`, via le service de
+    prévision si FORECAST_SERVICE_URL est défini, sinon localement.
+
+    Avec `intervals` (XGBoost seulement), ajoute les bornes P10/P50/P90.
+    """
+    intervals = intervals and model_key == "xgboost"
+    if FORECAST_SERVICE_URL:
+        return request_forecast(model_key, family, horizon, intervals=intervals)
+    if model_key == "naive":
+        return predict_with_naive(df_train_family, periods=horizon)
+    if model_key == "xgboost":
+        predictions = predict_with_xgboost(model, horizon, df_train_family, family)
+        quantile_model = load_quantile_model(family) if intervals else None
+        if quantile_model is not None:
+            bands = predict_with_xgboost_quantiles(
+                quantile_model, horizon, df_train_family, family
+            )
+            predictions = predictions.merge(bands, on="date", how="left")
+        return predictions
+    return predict_with_prophet(model, periods=horizon)
+
+
+def forecast_all_models(family, horizon, df_train_family, model_keys=MODEL_KEYS):
+    """
+    Lance les prévisions de tous les modèles en parallèle (threads : XGBoost et
+    les calculs NumPy de Prophet relâchent le GIL).
+
+    Returns:
+        DataFrame: table longue ['date', 'prediction', 'model']
+    """
+    # Chargement dans le thread principal (les appels st.* y sont autorisés)
+    models = {key: load_forecast_model(key, family) for key in model_keys}
+
+    with ThreadPoolExecutor(max_workers=len(model_keys)) as executor:
+        futures = {
+            key: executor.submit(
+                propagate(forecast), key, family, horizon, df_train_family, models[key]
+            )
+            for key in model_keys
+        }
+        predictions = [
+            future.result().assign(model=key) for key, future in futures.items()
+        ]
+    return pd.concat(predictions, ignore_index=True)
@@ -0,0 +1,86 @@
+"""
+Vérification de non-régression de `prepare_aggregated`.
+
+Compare l'agrégation hebdomadaire (dimension calendaire, en série et
+partitionnée) à une référence pandas directe (`.dt`) sur les transactions
+brutes, dont quelques dates sont rendues manquantes (NaT) : ces lignes sont
+ignorées par le groupby dans les deux cas. Le script échoue (code 1) en cas
+d'écart.
+
+    python benchmarks/check_aggregation.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.modeling import prepare_aggregated  # noqa: E402
+from src.parallel_aggregate import prepare_aggregated_parallel  # noqa: E402
+
+RAW_PATH = os.path.join(ROOT, "data", "raw", "transactions.csv")
+# Part des dates rendues manquantes
+MISSING_SHARE = 0.01
+SEED = 0
+
+
+def reference_aggregated(df):
+    """Agrégation hebdomadaire calculée directement avec les accesseurs `.dt`."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df["week_start"] = df["date"] - pd.to_timedelta(df["date"].dt.weekday, unit="D")
+    df["year"] = df["week_start"].dt.isocalendar().year
+    df["week"] = df["week_start"].dt.isocalendar().week
+    df["month"] = df["week_start"].dt.month
+    weekly = (
+        df.groupby(["family", "year", "month", "week", "week_start"])
+        .agg(
+            {
+                "price_initial": "mean",
+                "price_sold": "mean",
+                "revenue": "sum",
+                "discount_amount": "sum",
+                "quantity": "sum",
+            }
+        )
+        .reset_index()
+    )
+    return weekly.rename(columns={"week_start": "date"})
+
+
+def with_missing_dates(df):
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    rng = np.random.default_rng(SEED)
+    missing = rng.random(len(df)) < MISSING_SHARE
+    df.loc[missing, "date"] = pd.NaT
+    return df
+
+
+def main():
+    df = with_missing_dates(pd.read_csv(RAW_PATH))
+    expected = reference_aggregated(df)
+
+    failures = []
+    for label, compute in [
+        ("prepare_aggregated", lambda: prepare_aggregated(df)),
+        ("prepare_aggregated_parallel", lambda: prepare_aggregated_parallel(df)),
+    ]:
+        try:
+            pd.testing.assert_frame_equal(
+                compute(), expected, check_dtype=False, check_exact=False
+            )
+        except AssertionError as exc:
+            failures.append(label)
+            print(f"  {label:<30} ÉCART\n{exc}")
+        else:
+            print(f"  {label:<30} OK ({len(expected)} lignes)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Benchmark du temps d'import à froid de chaque page du dashboard.
+
+Pour chaque page, les imports de premier niveau du script sont rejoués dans
+un interpréteur neuf (sans cache de modules) ; on garde le meilleur de
+plusieurs essais. Le script échoue (code 1) si une page dépasse son budget.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --update-budget   # réécrit les budgets
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT, "benchmarks", "import_budget.json")
+PAGES = ["Contexte.py"] + sorted(glob.glob("pages/*.py", root_dir=ROOT))
+
+# Marge appliquée au temps mesuré lors de --update-budget
+BUDGET_MARGIN = 1.5
+
+
+def page_imports(page):
+    """Instructions d'import de premier niveau d'un script de page."""
+    with open(os.path.join(ROOT, page), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return [
+        ast.unparse(node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def measure_once(imports):
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        + "\n".join(imports)
+        + "\nprint(time.perf_counter() - start)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure(page, repeat=3):
+    imports = page_imports(page)
+    return min(measure_once(imports) for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--update-budget", action="store_true")
+    args = parser.parse_args()
+
+    with open(BUDGET_PATH, encoding="utf-8") as f:
+        budgets = json.load(f)
+
+    failures = []
+    for page in PAGES:
+        elapsed = measure(page, args.repeat)
+        budget = budgets.get(page)
+        status = "OK"
+        if args.update_budget:
+            budgets[page] = round(elapsed * BUDGET_MARGIN, 2)
+            status = "budget mis à jour"
+        elif budget is not None and elapsed > budget:
+            status = "DÉPASSEMENT"
+            failures.append(page)
+        print(f"{page:<32} {elapsed:6.2f} s  (budget {budgets.get(page)} s)  {status}")
+
+    if args.update_budget:
+        with open(BUDGET_PATH, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, indent=2)
+            f.write("\n")
+
+    if failures:
+        print(f"Budget d'import dépassé : {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark des formats de modèles : anciens fichiers (.pkl joblib, JSON
+Prophet complet) contre le bundle (UBJSON XGBoost, paramètres Prophet
+compressés, voir src/model_bundle.py).
+
+Mesure la taille sur disque et le temps de chargement de chaque modèle de
+models/, puis le chargement de milliers de modèles : les fichiers sont
+recopiés sous autant de familles fictives dans un dossier temporaire.
+
+    python benchmarks/model_bundles.py
+    python benchmarks/model_bundles.py --families 1000 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from src.model_bundle import (  # noqa: E402
+    MANIFEST,
+    bundle_key,
+    convert_models,
+    read_manifest,
+)
+from src.modeling import (  # noqa: E402
+    clear_loaded_models,
+    load_saved_model,
+    load_saved_prophet_model,
+    model_path,
+    prophet_path,
+)
+
+# Les anciens pickles XGBoost avertissent à chaque chargement
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Modèles qui existent aussi dans l'ancien format (le booster multi-quantiles
+# n'est sauvegardé qu'en bundle)
+MODEL_NAMES = ["xgboost", "prophet"]
+
+
+def legacy_path(model_name, family, path_dir):
+    if model_name == "prophet":
+        return prophet_path(family, path_dir)
+    return model_path(model_name, family, path_dir)
+
+
+def load(model_name, family, path_dir):
+    # Chargement à froid : pas de cache mémoire entre deux mesures
+    clear_loaded_models()
+    if model_name == "prophet":
+        return load_saved_prophet_model(family, path_dir)
+    return load_saved_model(model_name, family, path_dir)
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def prepare_dirs(models_dir, tmp_dir):
+    """Dossier legacy (anciens fichiers seuls) et dossier bundle converti."""
+    legacy_dir = os.path.join(tmp_dir, "legacy")
+    bundle_dir = os.path.join(tmp_dir, "bundle")
+    os.makedirs(legacy_dir)
+    for name in os.listdir(models_dir):
+        if name.endswith((".pkl", ".json")) and name != MANIFEST:
+            shutil.copy(os.path.join(models_dir, name), legacy_dir)
+    shutil.copytree(legacy_dir, bundle_dir)
+    convert_models(bundle_dir)
+    return legacy_dir, bundle_dir
+
+
+def replicate(legacy_dir, bundle_dir, n_families, out_dir):
+    """Recopie chaque modèle sous `n_families` familles fictives (deux formats)."""
+    manifest = read_manifest(bundle_dir)
+    entries = {}
+    source = next(iter({e["family"] for e in manifest["models"].values()}))
+    for i in range(n_families):
+        family = f"Famille{i:05d}"
+        for model_name in MODEL_NAMES:
+            entry = dict(manifest["models"][bundle_key(model_name, source)])
+            suffix = entry["file"][entry["file"].index(".") :]
+            entry["file"] = f"model_{model_name}_{family.lower()}{suffix}"
+            entry["family"] = family
+            shutil.copy(
+                os.path.join(
+                    bundle_dir,
+                    manifest["models"][bundle_key(model_name, source)]["file"],
+                ),
+                os.path.join(out_dir, "bundle", entry["file"]),
+            )
+            entries[bundle_key(model_name, family)] = entry
+            shutil.copy(
+                legacy_path(model_name, source, legacy_dir),
+                legacy_path(model_name, family, os.path.join(out_dir, "legacy")),
+            )
+    with open(os.path.join(out_dir, "bundle", MANIFEST), "w") as f:
+        json.dump({"version": manifest["version"], "models": entries}, f)
+    return [f"Famille{i:05d}" for i in range(n_families)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--families", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        legacy_dir, bundle_dir = prepare_dirs(args.models_dir, tmp_dir)
+        families = sorted(
+            {e["family"] for e in read_manifest(bundle_dir)["models"].values()}
+        )
+
+        print(
+            f"{'Modèle':<28}{'Ancien (Ko)':>12}{'Bundle (Ko)':>12}{'Ancien (ms)':>13}{'Bundle (ms)':>13}"
+        )
+        totals = [0, 0]
+        for model_name in MODEL_NAMES:
+            for family in families:
+                entry = read_manifest(bundle_dir)["models"][
+                    bundle_key(model_name, family)
+                ]
+                old_size = os.path.getsize(legacy_path(model_name, family, legacy_dir))
+                new_size = entry["bytes"]
+                totals[0] += old_size
+                totals[1] += new_size
+                old_ms = median_ms(
+                    lambda: load(model_name, family, legacy_dir), args.repeat
+                )
+                new_ms = median_ms(
+                    lambda: load(model_name, family, bundle_dir), args.repeat
+                )
+                print(
+                    f"{model_name + ' / ' + family:<28}{old_size / 1024:>12.1f}"
+                    f"{new_size / 1024:>12.1f}{old_ms:>13.2f}{new_ms:>13.2f}"
+                )
+        print(f"{'Total':<28}{totals[0] / 1024:>12.1f}{totals[1] / 1024:>12.1f}")
+
+        # Montée en charge : des milliers de modèles chargés à la suite
+        scale_dir = os.path.join(tmp_dir, "scale")
+        os.makedirs(os.path.join(scale_dir, "legacy"))
+        os.makedirs(os.path.join(scale_dir, "bundle"))
+        fake_families = replicate(legacy_dir, bundle_dir, args.families, scale_dir)
+        n_models = len(fake_families) * len(MODEL_NAMES)
+        print(
+            f"\nChargement de {n_models} modèles ({args.families} familles x {len(MODEL_NAMES)}) :"
+        )
+        for label in ("legacy", "bundle"):
+            path_dir = os.path.join(scale_dir, label)
+            start = time.perf_counter()
+            for family in fake_families:
+                for model_name in MODEL_NAMES:
+                    load(model_name, family, path_dir)
+            print(f"  {label:<8}{time.perf_counter() - start:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Benchmarks de chaque étape du pipeline à plusieurs facteurs d'échelle.
+
+Le facteur 1 correspond au jeu d'entraînement actuel (6 000 paniers). Pour
+un facteur k, les transactions sont dupliquées k fois avec des identifiants
+clients distincts (paniers distincts, mêmes distributions) ; seule l'étape
+`generate_transactions` génère réellement 6 000 x k paniers.
+
+Chaque étape est chronométrée, puis rejouée sous tracemalloc pour mesurer le
+pic mémoire Python (désactivable avec --no-memory). Les résultats sont ajoutés
+à benchmarks/history.jsonl, une ligne JSON par (commit, échelle, étape).
+
+    python benchmarks/run_benchmarks.py run --scales 1 10
+    python benchmarks/run_benchmarks.py run --scales 100 --skip generate_transactions
+    python benchmarks/run_benchmarks.py compare            # deux derniers commits
+    python benchmarks/run_benchmarks.py compare abc123 def456 --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from generator.data_generator import (  # noqa: E402
+    build_catalogue,
+    generate_discount_and_promotion_data,
+    generate_transactions,
+    load_profile,
+    profile_years,
+)
+from src.analysis import compute_family_distribution, compute_seasonality  # noqa: E402
+from src.data_cleaning import clean_dataset  # noqa: E402
+from src.graphes import build_graph_cooccurrence, compute_louvain_communities  # noqa: E402
+from src.modeling import (  # noqa: E402
+    load_saved_model,
+    load_saved_prophet_model,
+    predict_with_naive,
+    predict_with_prophet,
+    predict_with_xgboost,
+    prepare_aggregated,
+    prepare_features,
+    train_all_models,
+)
+from src.parallel_aggregate import prepare_aggregated_parallel  # noqa: E402
+
+HISTORY_PATH = os.path.join(ROOT, "benchmarks", "history.jsonl")
+RAW_PATH = "data/raw/transactions.csv"
+BASE_BASKETS = 6000
+HORIZON = 12
+
+STAGES = [
+    "generate_transactions",
+    "clean_dataset",
+    "prepare_aggregated",
+    "prepare_aggregated_parallel",
+    "prepare_features",
+    "train_all_models",
+    "predict_with_naive",
+    "predict_with_xgboost",
+    "predict_with_prophet",
+    "build_graph_cooccurrence",
+    "compute_louvain_communities",
+    "compute_seasonality",
+    "compute_family_distribution",
+]
+
+# Étapes dont le résultat sert à d'autres : exécutées (sans mesure) si besoin
+DEPENDENTS = {
+    "clean_dataset": set(STAGES) - {"generate_transactions", "clean_dataset"},
+    "prepare_aggregated": {
+        "prepare_features",
+        "train_all_models",
+        "predict_with_naive",
+        "predict_with_xgboost",
+        "predict_with_prophet",
+    },
+    "train_all_models": {"predict_with_xgboost", "predict_with_prophet"},
+    "build_graph_cooccurrence": {"compute_louvain_communities"},
+}
+
+
+def current_commit():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    if git("status", "--porcelain", "--untracked-files=no"):
+        commit += "-dirty"
+    return commit
+
+
+def scale_transactions(df, factor):
+    """Duplique les transactions `factor` fois avec des clients distincts."""
+    if factor == 1:
+        return df
+    copies = []
+    for i in range(factor):
+        copy = df.copy()
+        copy["client_id"] = copy["client_id"] + f"_{i}"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def measure(fn, memory=True):
+    """Temps d'exécution de `fn`, puis pic mémoire Python lors d'une 2e exécution."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+
+        peak_mb = None
+        if memory:
+            tracemalloc.start()
+            fn()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+    return result, elapsed, peak_mb
+
+
+def run_scale(scale, stages, memory, model_dir):
+    """Exécute toutes les étapes pour un facteur d'échelle, renvoie les mesures."""
+    records = []
+
+    def bench(stage, fn, rows):
+        # `rows` : nombre ou fonction, évaluée seulement si l'étape est mesurée
+        if stage not in stages:
+            # Étape non mesurée : exécutée seulement si une étape suivante en dépend
+            if not DEPENDENTS.get(stage, set()) & set(stages):
+                return None
+            with contextlib.redirect_stdout(io.StringIO()):
+                return fn()
+        result, elapsed, peak_mb = measure(fn, memory)
+        rows = rows() if callable(rows) else rows
+        records.append(
+            {"stage": stage, "seconds": elapsed, "peak_mb": peak_mb, "rows": rows}
+        )
+        memory_label = f"{peak_mb:9.1f} Mo" if peak_mb is not None else "        -"
+        print(f"  {stage:<30} {elapsed:9.3f} s  {memory_label}  ({rows} lignes)")
+        return result
+
+    def generate():
+        profile = load_profile()
+        random.seed(profile["seed"])
+        np.random.seed(profile["seed"])
+        _, promotion_df = generate_discount_and_promotion_data(
+            profile, profile_years(profile), list(range(1, 53)), output_dir=None
+        )
+        products_df, client_profiles = build_catalogue(profile)
+        dates = pd.date_range(
+            start=profile["train"]["start"], end=profile["train"]["end"], freq="D"
+        )
+        return generate_transactions(
+            dates,
+            BASE_BASKETS * scale,
+            products_df,
+            client_profiles,
+            promotion_df,
+            profile,
+        )
+
+    bench("generate_transactions", generate, BASE_BASKETS * scale)
+
+    if not set(stages) - {"generate_transactions"}:
+        return records
+
+    raw = scale_transactions(pd.read_csv(RAW_PATH), scale)
+    clean = bench("clean_dataset", lambda: clean_dataset(raw), len(raw))
+    families = list(clean["family"].unique())
+    weekly = bench("prepare_aggregated", lambda: prepare_aggregated(clean), len(clean))
+    # Une partition par cœur (os.cpu_count())
+    bench(
+        "prepare_aggregated_parallel",
+        lambda: prepare_aggregated_parallel(clean),
+        len(clean),
+    )
+    if weekly is None:
+        stages = [s for s in stages if s not in DEPENDENTS["prepare_aggregated"]]
+
+    bench(
+        "prepare_features",
+        lambda: [prepare_features(weekly[weekly["family"] == f], f) for f in families],
+        lambda: len(weekly),
+    )
+    bench(
+        "train_all_models",
+        lambda: train_all_models(weekly, model_dir),
+        lambda: len(weekly),
+    )
+
+    if weekly is None:
+        weekly = pd.DataFrame(columns=["family"])
+    history = {f: weekly[weekly["family"] == f] for f in families}
+    bench(
+        "predict_with_naive",
+        lambda: [predict_with_naive(history[f], periods=HORIZON) for f in families],
+        len(families),
+    )
+    trained = "train_all_models" in stages or DEPENDENTS["train_all_models"] & set(
+        stages
+    )
+    xgb_models = {
+        f: load_saved_model("xgboost", f, model_dir) if trained else None
+        for f in families
+    }
+    bench(
+        "predict_with_xgboost",
+        lambda: [
+            predict_with_xgboost(xgb_models[f], HORIZON, history[f], f)
+            for f in families
+        ],
+        len(families),
+    )
+    prophet_models = {
+        f: load_saved_prophet_model(f, model_dir) if trained else None for f in families
+    }
+    bench(
+        "predict_with_prophet",
+        lambda: [
+            predict_with_prophet(prophet_models[f], periods=HORIZON) for f in families
+        ],
+        len(families),
+    )
+
+    graph = bench(
+        "build_graph_cooccurrence",
+        lambda: build_graph_cooccurrence(clean, min_edge_weight=20),
+        len(clean),
+    )
+    bench(
+        "compute_louvain_communities",
+        lambda: compute_louvain_communities(graph),
+        graph.number_of_edges() if graph is not None else 0,
+    )
+    bench(
+        "compute_seasonality",
+        lambda: compute_seasonality(clean, families),
+        len(clean),
+    )
+    bench(
+        "compute_family_distribution",
+        lambda: compute_family_distribution(clean, families),
+        len(clean),
+    )
+    return records
+
+
+def run(args):
+    stages = [s for s in (args.stages or STAGES) if s not in args.skip]
+    commit = current_commit()
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    with open(HISTORY_PATH, "a", encoding="utf-8") as history:
+        for scale in args.scales:
+            print(f"Échelle x{scale} (commit {commit})")
+            with tempfile.TemporaryDirectory() as model_dir:
+                records = run_scale(scale, stages, not args.no_memory, model_dir)
+            for record in records:
+                record = {
+                    "commit": commit,
+                    "timestamp": timestamp,
+                    "scale": scale,
+                    **record,
+                }
+                history.write(json.dumps(record) + "\n")
+
+
+def load_history():
+    with open(HISTORY_PATH, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare(args):
+    """Compare deux commits : signale les étapes plus lentes de plus de `threshold`."""
+    history = load_history()
+    commits = list(dict.fromkeys(history["commit"]))
+    base = args.base or (commits[-2] if len(commits) > 1 else None)
+    head = args.head or commits[-1]
+    if base is None:
+        print("Historique insuffisant : au moins deux commits sont nécessaires.")
+        sys.exit(1)
+
+    # Médiane des mesures répétées d'un même commit
+    summary = (
+        history[history["commit"].isin([base, head])]
+        .groupby(["commit", "scale", "stage"])[["seconds", "peak_mb"]]
+        .median()
+    )
+    regressions = 0
+    print(f"{'échelle':>7}  {'étape':<30} {base:>12} {head:>12}  ratio")
+    for (scale, stage), row in summary.loc[head].iterrows():
+        if (base, scale, stage) not in summary.index:
+            continue
+        before = summary.loc[(base, scale, stage)]
+        ratio = row["seconds"] / before["seconds"] if before["seconds"] else np.nan
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  RÉGRESSION"
+            regressions += 1
+        print(
+            f"{scale:>7}  {stage:<30} {before['seconds']:11.3f}s "
+            f"{row['seconds']:11.3f}s  {ratio:5.2f}{flag}"
+        )
+
+    if regressions:
+        print(f"{regressions} régression(s) au-delà de +{args.threshold:.0%}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Exécute les benchmarks")
+    run_parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    run_parser.add_argument("--stages", nargs="+", choices=STAGES)
+    run_parser.add_argument("--skip", nargs="+", choices=STAGES, default=[])
+    run_parser.add_argument("--no-memory", action="store_true")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="Compare deux commits")
+    compare_parser.add_argument("base", nargs="?")
+    compare_parser.add_argument("head", nargs="?")
+    compare_parser.add_argument("--threshold", type=float, default=0.2)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,64 @@ import random
 from faker import Faker
 import uuid
 import os
+import json
+import argparse
 
+fake = Faker()
 
-def generate_discount_and_promotion_data(families, years, weeks):
-    avg_discount_dict = {
-        "Shirt": {y: {w: np.random.uniform(0.05, 0.20) for w in weeks} for y in years},
-        "Activewear": {
-            y: {w: np.random.uniform(0.10, 0.25) for w in weeks} for y in years
-        },
-        "Hoodie": {y: {w: np.random.uniform(0.02, 0.15) for w in weeks} for y in years},
-    }
+PROFILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+DEFAULT_PROFILE = os.path.join(PROFILES_DIR, "default.json")
+
+
+def load_profile(path=DEFAULT_PROFILE):
+    """
+    Charge un profil de génération (JSON).
+
+    `families` peut être une liste de noms ou {"count": N, "prefix": "..."}
+    pour générer N familles. Dans les tables par famille (saisonnalité,
+    remises, boosts promo...), la clé "default" s'applique aux familles
+    non listées.
+    """
+    with open(path, "r") as f:
+        profile = json.load(f)
+
+    families = profile["families"]
+    if isinstance(families, dict):
+        profile["families"] = [
+            f"{families['prefix']} {i}" for i in range(1, families["count"] + 1)
+        ]
+    return profile
+
+
+def family_setting(table, family, fallback=None):
+    """Valeur d'une table par famille, avec repli sur la clé "default"."""
+    return table.get(family, table.get("default", fallback))
+
+
+def profile_years(profile):
+    """Années couvertes par les périodes train et test."""
+    start = pd.Timestamp(profile["train"]["start"]).year
+    end = pd.Timestamp(profile["test"]["end"]).year
+    return list(range(start, end + 1))
+
+
+def generate_discount_and_promotion_data(profile, years, weeks, output_dir="data"):
+    families = profile["families"]
+    ranges = profile["avg_discount_range"]
+
+    # Ordre de tirage : familles déclarées dans la table, puis les autres
+    draw_order = [f for f in ranges if f in families]
+    draw_order += [f for f in families if f not in draw_order]
+    avg_discount_dict = {}
+    for fam in draw_order:
+        low, high = family_setting(ranges, fam)
+        avg_discount_dict[fam] = {
+            y: {w: np.random.uniform(low, high) for w in weeks} for y in years
+        }
 
     promotion_type_dict = {
         fam: {
-            y: {w: np.random.choice(["online", "store", "both", "none"]) for w in weeks}
+            y: {w: np.random.choice(profile["promotion_types"]) for w in weeks}
             for y in years
         }
         for fam in families
@@ -41,40 +85,54 @@ def generate_discount_and_promotion_data(families, years, weeks):
         promotion_data, columns=["family", "year", "week", "promotion_type"]
     )
 
-    discount_df.to_csv("data/avg_discount.csv", index=False)
-    promotion_df.to_csv("data/promotion_type.csv", index=False)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        discount_df.to_csv(os.path.join(output_dir, "avg_discount.csv"), index=False)
+        promotion_df.to_csv(os.path.join(output_dir, "promotion_type.csv"), index=False)
 
     return discount_df, promotion_df
 
 
-def seasonal_multiplier(family, month):
-    if family == "Activewear":
-        if month == 5:
-            return 2.0
-        elif month == 6:
-            return 3.2
-        elif month in [7, 8]:
-            return 2.5
-        else:
-            return 0.6
-    elif family == "Hoodie":
-        return 1.1
-    elif family == "Shirt":
-        if month in [4, 5]:
-            return 2.2
-        elif month in [3, 9]:
-            return 1.5
-        else:
-            return 0.9
-    return 1.0
-
-
-def weekly_modulator(week_number):
-    return 1 + 0.5 * np.exp(-(((week_number - 26) / 4) ** 2))
-
-
-def generate_transactions(dates, n_days):
+def seasonal_multiplier(profile, family, month):
+    return family_setting(profile["seasonality"], family)[month - 1]
+
+
+def weekly_modulator(profile, family, week_number):
+    modulation = profile["weekly_modulation"]
+    if family not in modulation["families"]:
+        return 1.0
+    center, width = modulation["center_week"], modulation["width"]
+    return 1 + modulation["amplitude"] * np.exp(
+        -(((week_number - center) / width) ** 2)
+    )
+
+
+def generate_transactions(
+    dates, n_days, products_df, client_profiles, promotion_df, profile
+):
     transactions = []
+    families = profile["families"]
+    channels = profile["channels"]
+    n_clients = len(client_profiles)
+    min_items, max_items = profile["basket_size"]
+    base_quantity = profile["quantity"]["base"]
+    min_quantity, max_quantity = profile["quantity"]["clip"]
+
+    # Tables de recherche précalculées (au lieu de filtres pandas par article)
+    products_by_family = {
+        fam: group[["product_id", "product_label", "price_initial"]].to_numpy()
+        for fam, group in products_df.groupby("family")
+    }
+    promo_lookup = dict(
+        zip(
+            zip(promotion_df["family"], promotion_df["year"], promotion_df["week"]),
+            promotion_df["promotion_type"],
+        )
+    )
+    family_weights = {
+        name: [family_setting(p["family_weights"], fam) for fam in families]
+        for name, p in profile["client_profiles"].items()
+    }
 
     weekly_quantity_map = {}
     for date in dates:
@@ -84,59 +142,41 @@ def generate_transactions(dates, n_days):
 
     for _ in range(n_days):
         client_id = f"C{random.randint(1, n_clients):04}"
-        profile = client_profiles[client_id]
+        profile_name = client_profiles[client_id]
         date = random.choice(dates)
         month = date.month
         channel = random.choice(channels)
-        n_items = np.random.randint(2, 6)
+        n_items = np.random.randint(min_items, max_items)
 
-        if profile == "sportif":
-            chosen_families = random.choices(families, weights=[1, 1, 8], k=n_items)
-        elif profile == "formel":
-            chosen_families = random.choices(families, weights=[1, 8, 1], k=n_items)
-        else:
-            chosen_families = random.choices(families, weights=[3, 3, 3], k=n_items)
+        chosen_families = random.choices(
+            families, weights=family_weights[profile_name], k=n_items
+        )
 
         for fam in chosen_families:
-            product = products_df[products_df["family"] == fam].sample(1).iloc[0]
-            base_price = product["price_initial"]
+            # Même tirage que DataFrame.sample(1)
+            candidates = products_by_family[fam]
+            product_id, product_label, base_price = candidates[
+                np.random.choice(len(candidates), size=1, replace=False)[0]
+            ]
 
             year, week = date.isocalendar().year, date.isocalendar().week
-            seasonal = seasonal_multiplier(fam, month)
-            modulation = weekly_modulator(week)
-
-            promo_type = (
-                promotion_df.query(
-                    "family == @fam and year == @year and week == @week"
-                )["promotion_type"].values[0]
-                if not promotion_df.empty
-                else "none"
-            )
+            seasonal = seasonal_multiplier(profile, fam, month)
+            modulation = weekly_modulator(profile, fam, week)
 
-            if fam == "Activewear":
-                quantity = int(np.clip(5 * seasonal * modulation, 1, 25))
-            elif fam == "Hoodie":
-                promo_boost = {
-                    "online": 2.0,
-                    "store": 1.5,
-                    "both": 2.5,
-                    "none": 1.0,
-                }.get(promo_type, 1.0)
-                quantity = int(np.clip(5 * promo_boost, 1, 25))
-            elif fam == "Shirt":
-                promo_boost = {
-                    "online": 1.1,
-                    "store": 1.0,
-                    "both": 1.2,
-                    "none": 1.0,
-                }.get(promo_type, 1.0)
-                quantity = int(np.clip(5 * seasonal * modulation * promo_boost, 1, 25))
-
-            discount = round(
-                np.random.uniform(0.1, 0.3 if channel == "Online" else 0.2)
-                * base_price,
-                2,
+            promo_type = promo_lookup.get((fam, year, week), "none")
+            promo_boost = family_setting(profile["promo_boost"], fam, {}).get(
+                promo_type, 1.0
+            )
+            quantity = int(
+                np.clip(
+                    base_quantity * seasonal * modulation * promo_boost,
+                    min_quantity,
+                    max_quantity,
+                )
             )
+
+            low, high = family_setting(profile["channel_discount_range"], channel)
+            discount = round(np.random.uniform(low, high) * base_price, 2)
             price_sold = max(0.0, base_price - discount)
             revenue = round(price_sold * quantity, 2)
 
@@ -146,9 +186,9 @@ def generate_transactions(dates, n_days):
                     "client_id": client_id,
                     "date": date.strftime("%Y-%m-%d"),
                     "channel": channel,
-                    "product_id": product["product_id"],
-                    "product_label": product["product_label"],
-                    "family": product["family"],
+                    "product_id": product_id,
+                    "product_label": product_label,
+                    "family": fam,
                     "price_initial": base_price,
                     "price_sold": price_sold,
                     "discount_amount": round(discount * quantity, 2),
@@ -160,62 +200,107 @@ def generate_transactions(dates, n_days):
     return pd.DataFrame(transactions)
 
 
-# Initialisation
-fake = Faker()
-random.seed(42)
-np.random.seed(42)
-
-n_clients = 500
-n_products_per_family = 30
-families = ["Hoodie", "Shirt", "Activewear"]
-channels = ["Store", "Online"]
-years = [2022, 2023, 2024]
-weeks = list(range(1, 53))
-
-train_dates = pd.date_range(start="2022-03-01", end="2024-02-29", freq="D")
-test_dates = pd.date_range(start="2024-03-01", end="2024-08-31", freq="D")
-
-discount_df, promotion_df = generate_discount_and_promotion_data(families, years, weeks)
-
-products = []
-for family in families:
-    for i in range(n_products_per_family):
-        product_id = f"P{len(products):04}"
-        label = (
-            f"{family} {random.choice(['Z', 'X', 'M', 'A'])}{random.randint(10, 99)}"
-        )
-        price = round(np.random.uniform(20, 100), 2)
-        products.append(
-            {
-                "product_id": product_id,
-                "product_label": label,
-                "family": family,
-                "price_initial": price,
-            }
-        )
-products_df = pd.DataFrame(products)
+def build_catalogue(profile):
+    """Catalogue produits et profils clients."""
+    low_price, high_price = profile["price_range"]
+    products = []
+    for family in profile["families"]:
+        for i in range(profile["products_per_family"]):
+            product_id = f"P{len(products):04}"
+            label = f"{family} {random.choice(profile['label_codes'])}{random.randint(10, 99)}"
+            price = round(np.random.uniform(low_price, high_price), 2)
+            products.append(
+                {
+                    "product_id": product_id,
+                    "product_label": label,
+                    "family": family,
+                    "price_initial": price,
+                }
+            )
+    products_df = pd.DataFrame(products)
+
+    names = list(profile["client_profiles"])
+    weights = [p["weight"] for p in profile["client_profiles"].values()]
+    client_profiles = {
+        f"C{i:04}": random.choices(names, weights=weights)[0]
+        for i in range(1, profile["n_clients"] + 1)
+    }
+    return products_df, client_profiles
+
+
+def generate_dataset(profile, output_dir=None):
+    """
+    Génère les tables remises/promotions et les transactions train/test d'un profil.
+
+    Returns:
+        Tuple[DataFrame, DataFrame]: transactions train (avec anomalies) et test
+    """
+    # Initialisation
+    random.seed(profile["seed"])
+    np.random.seed(profile["seed"])
+
+    train_dates = pd.date_range(
+        start=profile["train"]["start"], end=profile["train"]["end"], freq="D"
+    )
+    test_dates = pd.date_range(
+        start=profile["test"]["start"], end=profile["test"]["end"], freq="D"
+    )
+    weeks = list(range(1, 53))
+
+    _, promotion_df = generate_discount_and_promotion_data(
+        profile, profile_years(profile), weeks, output_dir=output_dir
+    )
+    products_df, client_profiles = build_catalogue(profile)
+
+    train_df = generate_transactions(
+        train_dates,
+        profile["train"]["baskets"],
+        products_df,
+        client_profiles,
+        promotion_df,
+        profile,
+    )
+    test_df = generate_transactions(
+        test_dates,
+        profile["test"]["baskets"],
+        products_df,
+        client_profiles,
+        promotion_df,
+        profile,
+    )
+
+    anomalies = profile["anomalies"]
+    outliers = np.random.choice(
+        train_df.index, size=anomalies["outliers"], replace=False
+    )
+    train_df.loc[outliers, "quantity"] *= anomalies["outlier_factor"]
+    train_df.loc[outliers, "revenue"] = (
+        train_df.loc[outliers, "price_sold"] * train_df.loc[outliers, "quantity"]
+    )
+
+    nans = np.random.choice(
+        train_df.index, size=anomalies["missing_price_sold"], replace=False
+    )
+    train_df.loc[nans, "price_sold"] = np.nan
+
+    return train_df, test_df
 
-client_profiles = {
-    f"C{i:04}": random.choices(
-        ["sportif", "formel", "urbain"], weights=[0.3, 0.3, 0.4]
-    )[0]
-    for i in range(1, n_clients + 1)
-}
 
-train_df = generate_transactions(train_dates, n_days=6000)
-test_df = generate_transactions(test_dates, n_days=1500)
+def main(profile_path=DEFAULT_PROFILE, output_dir="data"):
+    profile = load_profile(profile_path)
+    train_df, test_df = generate_dataset(profile, output_dir=output_dir)
 
-outliers = np.random.choice(train_df.index, size=20, replace=False)
-train_df.loc[outliers, "quantity"] *= 10
-train_df.loc[outliers, "revenue"] = (
-    train_df.loc[outliers, "price_sold"] * train_df.loc[outliers, "quantity"]
-)
+    raw_dir = os.path.join(output_dir, "raw")
+    os.makedirs(raw_dir, exist_ok=True)
+    train_df.to_csv(os.path.join(raw_dir, "transactions.csv"), index=False)
+    test_df.to_csv(os.path.join(raw_dir, "transactions_test.csv"), index=False)
 
-nans = np.random.choice(train_df.index, size=20, replace=False)
-train_df.loc[nans, "price_sold"] = np.nan
+    print(f"✅ Données régénérées (profil {profile['name']}) dans {output_dir}.")
 
-os.makedirs("data/raw", exist_ok=True)
-train_df.to_csv("data/raw/transactions.csv", index=False)
-test_df.to_csv("data/raw/transactions_test.csv", index=False)
 
-print("✅ Données régénérées avec comportements différenciés par famille.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Générateur de transactions")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE)
+    parser.add_argument("--output-dir", default="data")
+    args = parser.parse_args()
+    main(args.profile, args.output_dir)
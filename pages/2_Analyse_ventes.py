@@ -1,10 +1,18 @@
 import json
+import pandas as pd
 import streamlit as st
-from app.utils import load_data
+from app.utils import (
+    get_progressive_distribution,
+    get_progressive_seasonality,
+    load_data,
+)
 from app.figures import plot_seasonality, plot_family_distribution
+from app.perf_panel import begin_page, render_perf_panel
+from app.progressive import approximate_caption, approximate_toggle, show_progressive
 from src.analysis import compute_seasonality, compute_family_distribution
 
 st.set_page_config(page_title="Analyse des ventes", page_icon="📊")
+begin_page()
 
 
 with open("commentaires/commentaires.json", "r") as f:
@@ -59,6 +67,7 @@ st.markdown(
 
 # Chargement des données
 df = load_data()
+approximate = approximate_toggle(df)
 
 # Titre
 st.markdown(
@@ -86,20 +95,62 @@ if not selected_families:
     st.warning(
         "Veuillez sélectionner au moins une famille pour afficher les visualisations."
     )
+    render_perf_panel()
     st.stop()
 
 # Graphe 1 : Saisonnalité
 st.subheader("📅 Saisonnalité des ventes")
-seasonality_df = compute_seasonality(df, selected_families)
-plot_seasonality(seasonality_df)
+
+# Fenêtre de mois affichée : seuls ses points sont sous-échantillonnés et envoyés
+months = (
+    pd.period_range(
+        pd.to_datetime(df["date"].min()), pd.to_datetime(df["date"].max()), freq="M"
+    )
+    .astype(str)
+    .tolist()
+)
+month_range = st.select_slider(
+    "Période affichée :", options=months, value=(months[0], months[-1])
+)
+x_range = None if month_range == (months[0], months[-1]) else month_range
+if approximate:
+
+    def render_seasonality(seasonality_df, fraction):
+        if fraction is not None:
+            st.caption(approximate_caption(fraction))
+        plot_seasonality(seasonality_df, x_range=x_range)
+
+    show_progressive(
+        get_progressive_seasonality(tuple(selected_families)),
+        render_seasonality,
+        clear=get_progressive_seasonality.clear,
+    )
+else:
+    seasonality_df = compute_seasonality(df, selected_families)
+    plot_seasonality(seasonality_df, x_range=x_range)
 st.subheader("💬 Commentaires de l'analyse saisonnière")
 for family in selected_families:
     st.markdown(comments_data["analyses"]["saisonnalite"][family])
 
 # Graphe 2 : Concentration des ventes
 st.subheader("📦 Répartition des ventes par produit")
-distribution_df = compute_family_distribution(df, selected_families)
-plot_family_distribution(distribution_df, selected_families)
+if approximate:
+
+    def render_distribution(distribution_df, fraction):
+        if fraction is not None:
+            st.caption(approximate_caption(fraction))
+        plot_family_distribution(distribution_df, selected_families)
+
+    show_progressive(
+        get_progressive_distribution(tuple(selected_families)),
+        render_distribution,
+        clear=get_progressive_distribution.clear,
+    )
+else:
+    distribution_df = compute_family_distribution(df, selected_families)
+    plot_family_distribution(distribution_df, selected_families)
 st.subheader("💬 Commentaires de la répartition des ventes")
 for family in selected_families:
     st.markdown(comments_data["analyses"]["repartition_ventes"][family])
+
+render_perf_panel()
@@ -1,16 +1,25 @@
 import json
 import streamlit as st
-from app.utils import load_model, load_prophet_model, load_all_data
-from app.figures import plot_predictions_vs_truth
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from src.modeling import (
-    predict_with_prophet,
-    predict_with_naive,
-    predict_with_xgboost,
+from app.utils import (
+    explain_forecast,
+    forecast,
+    forecast_all_models,
+    get_leaderboard,
+    load_all_data,
+    load_forecast_model,
 )
+from app.figures import (
+    plot_contributions,
+    plot_models_vs_truth,
+    plot_predictions_vs_truth,
+    show_chart,
+)
+from app.perf_panel import begin_page, render_perf_panel
+from src.evaluation import compute_metrics, recommended_models
 
 
 st.set_page_config(page_title="🧠 Modélisation des ventes", page_icon="🧠")
+begin_page()
 
 with open("commentaires/commentaires.json", "r") as f:
     comments_data = json.load(f)
@@ -78,37 +87,46 @@ family = st.selectbox("Famille de produits :", ["Shirt", "Activewear", "Hoodie"]
 # Choix du modèle
 model_map = {"Naïf (valeur t−1)": "naive", "XGBoost": "xgboost", "Prophet": "prophet"}
 
-best_models_by_family = {
-    "Shirt": "XGBoost",
-    "Hoodie": "XGBoost",
-    "Activewear": "Prophet",
-}
+model_labels = {key: label for label, key in model_map.items()}
+
+# Modèle recommandé : meilleur rang moyen (RMSE) du leaderboard précalculé
+leaderboard = get_leaderboard()
+best_models_by_family = (
+    recommended_models(leaderboard) if leaderboard is not None else {}
+)
 
-best_model = best_models_by_family.get(family, "N/A")
+best_model = model_labels.get(best_models_by_family.get(family), "N/A")
 st.markdown(f"🧠 **Modèle recommandé pour cette famille** : `{best_model}`")
 
-model_choice = st.radio("Modèle :", ["Naïf (valeur t−1)", "XGBoost", "Prophet"])
-model_key = model_map[model_choice]
+COMPARE_ALL = "Comparer tous les modèles"
+model_choice = st.radio(
+    "Modèle :", ["Naïf (valeur t−1)", "XGBoost", "Prophet", COMPARE_ALL]
+)
+compare_all = model_choice == COMPARE_ALL
+model_key = None if compare_all else model_map[model_choice]
 
 # Affichage des commentaires avant de lancer la modélisation
-st.subheader("💬 Commentaires sur la modélisation")
-if model_key == "naive":
-    st.markdown("### Modèle Naïf (valeur t−1)")
-elif model_key == "xgboost":
-    st.markdown("### Modèle XGBoost")
-elif model_key == "prophet":
-    st.markdown("### Modèle Prophet")
+if not compare_all:
+    st.subheader("💬 Commentaires sur la modélisation")
+    if model_key == "naive":
+        st.markdown("### Modèle Naïf (valeur t−1)")
+    elif model_key == "xgboost":
+        st.markdown("### Modèle XGBoost")
+    elif model_key == "prophet":
+        st.markdown("### Modèle Prophet")
 
-st.markdown(
-    f"**Méthodologie** : {comments_data['modelisation'][model_key]['methodologie']}"
-)
-st.markdown(
-    f"**Features** : {', '.join(comments_data['modelisation'][model_key]['features'])}"
-)
-st.markdown(f"**Avantages** : {comments_data['modelisation'][model_key]['avantages']}")
-st.markdown(
-    f"**Inconvénients** : {comments_data['modelisation'][model_key]['inconvenients']}"
-)
+    st.markdown(
+        f"**Méthodologie** : {comments_data['modelisation'][model_key]['methodologie']}"
+    )
+    st.markdown(
+        f"**Features** : {', '.join(comments_data['modelisation'][model_key]['features'])}"
+    )
+    st.markdown(
+        f"**Avantages** : {comments_data['modelisation'][model_key]['avantages']}"
+    )
+    st.markdown(
+        f"**Inconvénients** : {comments_data['modelisation'][model_key]['inconvenients']}"
+    )
 
 
 # Load du DS de Test :
@@ -124,30 +142,48 @@ if st.button("Lancer la modélisation"):
     df_train_family = df_train[df_train["family"] == family]
     df_test_family = df_test[df_test["family"] == family]
 
-    if model_key == "naive":
-        pred_df = predict_with_naive(df_train_family, periods=horizon)
-
-    elif model_key == "xgboost":
-        model = load_model("xgboost", family)
-        pred_df = predict_with_xgboost(model, horizon, df_train_family, family)
+    if compare_all:
+        # Les trois modèles tournent en parallèle
+        pred_df = forecast_all_models(family, horizon, df_train_family)
+    else:
+        model = load_forecast_model(model_key, family)
+        pred_df = forecast(
+            model_key, family, horizon, df_train_family, model, intervals=True
+        )
+        pred_df = pred_df.assign(model=model_key)
 
-    elif model_key == "prophet":
-        model = load_prophet_model(family)
-        pred_df = predict_with_prophet(model, periods=horizon)
     test_dates = df_test_family["date"].unique()
     pred_df = pred_df[pred_df["date"].isin(test_dates)]
 
     df_eval = df_test_family.merge(pred_df, on="date", how="inner")
-    y_true = df_eval["quantity"]
-    y_pred = df_eval["prediction"]
 
-    rmse = mean_squared_error(y_true, y_pred) ** 0.5
-    mae = mean_absolute_error(y_true, y_pred)
-    r2 = r2_score(y_true, y_pred)
+    # Métriques de la prévision affichée (le leaderboard ne sert qu'à la
+    # recommandation : il peut dater d'une autre version des modèles)
+    metrics = compute_metrics(df_eval, group_cols=["model"])
+
+    if compare_all:
+        st.subheader("📈 Courbe des ventes réelles vs prédites")
+        fig = plot_models_vs_truth(df_eval, family_name=family)
+        show_chart(fig)
+
+        st.subheader("📊 Évaluation des modèles")
+        st.dataframe(
+            metrics.assign(model=metrics["model"].map(model_labels))
+            .rename(
+                columns={"model": "Modèle", "rmse": "RMSE", "mae": "MAE", "r2": "R²"}
+            )[["Modèle", "RMSE", "MAE", "R²"]]
+            .sort_values("RMSE"),
+            hide_index=True,
+            use_container_width=True,
+        )
+        render_perf_panel()
+        st.stop()
+
+    rmse, mae, r2 = metrics.loc[0, ["rmse", "mae", "r2"]]
     st.subheader("📈 Courbe des ventes réelles vs prédites")
 
     fig = plot_predictions_vs_truth(df_eval, family_name=family)
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
 
     st.subheader("📊 Évaluation du modèle")
     col1, col2, col3 = st.columns(3)
@@ -155,6 +191,17 @@ if st.button("Lancer la modélisation"):
     col2.metric("MAE", f"{mae:,.0f}")
     col3.metric("R²", f"{r2:.3f}")
 
+    if model_key == "xgboost":
+        st.subheader("🧩 Contributions des features aux prévisions")
+        contributions = explain_forecast(family, horizon, df_train_family, model)
+        show_chart(plot_contributions(contributions, family_name=family))
+        st.caption(
+            "Valeurs SHAP calculées par XGBoost (`pred_contribs`) : chaque semaine, "
+            "la prévision est le niveau de base plus la somme des contributions. "
+            "Une barre positive tire la prévision vers le haut (promotion, saison), "
+            "une barre négative vers le bas."
+        )
+
     st.subheader("📝 Interprétation des résultats")
     commentaire_model = (
         comments_data.get("modelisation", {})
@@ -169,3 +216,5 @@ if st.button("Lancer la modélisation"):
         st.info(
             "Aucun commentaire spécifique n’est encore défini pour cette combinaison famille/modèle."
         )
+
+render_perf_panel()
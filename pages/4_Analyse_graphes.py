@@ -1,9 +1,12 @@
 import streamlit as st
-from app.utils import load_data
-from app.figures import plot_product_graph
+from app.utils import get_progressive_cooccurrence, load_data
+from app.figures import plot_product_graph, show_chart
+from app.perf_panel import begin_page, render_perf_panel
+from app.progressive import approximate_caption, approximate_toggle, show_progressive
 from src.graphes import build_graph_cooccurrence, compute_louvain_communities
 
 st.set_page_config(page_title="🔗 Analyse Graphe", page_icon="🔗")
+begin_page()
 
 # Barre de navigation
 st.markdown(
@@ -67,6 +70,7 @@ st.markdown(
 
 # Chargement des données
 df = load_data()
+approximate = approximate_toggle(df)
 
 nb_products = st.slider(
     "Nombre de produits à inclure dans le graphe :",
@@ -78,11 +82,11 @@ nb_products = st.slider(
 )
 
 # Filtrage dynamique selon le slider
-top_products = df["product_label"].value_counts().head(nb_products).index.tolist()
-df_top = df[df["product_label"].isin(top_products)]
-
-# Construction du graphe
-G = build_graph_cooccurrence(df_top, min_edge_weight=20)
+# (égalités départagées par libellé : sélection indépendante du format des colonnes)
+counts = df["product_label"].value_counts().sort_index()
+top_products = (
+    counts.sort_values(ascending=False, kind="stable").head(nb_products).index.tolist()
+)
 
 
 # Titre + bouton centrés
@@ -94,22 +98,43 @@ with st.container():
     )
     st.markdown("</div>", unsafe_allow_html=True)
 
-# Application de Louvain si cliqué
-color_map = None
-if detect:
-    communities = compute_louvain_communities(G)
-    color_map = {node: i for i, com in enumerate(communities) for node in com}
 
-# Affichage du graphe
-fig = plot_product_graph(G, color_map=color_map)
-st.plotly_chart(fig, use_container_width=True)
+def render_graph(G, fraction):
+    if fraction is not None:
+        st.caption(approximate_caption(fraction, "poids des arêtes extrapolés"))
+
+    # Application de Louvain si cliqué
+    color_map = None
+    if detect:
+        communities = compute_louvain_communities(G)
+        color_map = {node: i for i, com in enumerate(communities) for node in com}
+
+    # Affichage du graphe
+    fig = plot_product_graph(G, color_map=color_map)
+    show_chart(fig)
 
-if color_map:
-    st.markdown(f"**Nombre de communautés détectées : {len(set(color_map.values()))}**")
+    if color_map:
+        st.markdown(
+            f"**Nombre de communautés détectées : {len(set(color_map.values()))}**"
+        )
 
-    st.markdown(
-        """
-        📌 La détection des communautés dans un graphe permet de repérer des groupes de produits qui sont fréquemment achetés ensemble.\n
-        Cela peut être utile pour optimiser le placement des produits en magasin et comprendre les comportements d'achat des clients
-        """
+        st.markdown(
+            """
+            📌 La détection des communautés dans un graphe permet de repérer des groupes de produits qui sont fréquemment achetés ensemble.\n
+            Cela peut être utile pour optimiser le placement des produits en magasin et comprendre les comportements d'achat des clients
+            """
+        )
+
+
+# Construction du graphe (échantillon de paniers puis exact en mode approché)
+if approximate:
+    show_progressive(
+        get_progressive_cooccurrence(tuple(top_products), 20),
+        render_graph,
+        clear=get_progressive_cooccurrence.clear,
     )
+else:
+    df_top = df[df["product_label"].isin(top_products)]
+    render_graph(build_graph_cooccurrence(df_top, min_edge_weight=20), None)
+
+render_perf_panel()
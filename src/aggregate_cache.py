@@ -0,0 +1,84 @@
+"""
+Cache disque des agrégats hebdomadaires.
+
+La clé de cache combine un hash du contenu du fichier source, les paramètres
+d'agrégation et une version du code d'agrégation. Les agrégats sont stockés en
+Parquet et partagés entre processus (écriture atomique par renommage).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+from src.instrumentation import set_cache_status, stage
+from src.modeling import prepare_aggregated
+
+# À incrémenter dès que la logique de `prepare_aggregated` change
+CACHE_VERSION = 1
+CACHE_DIR = "data/cache"
+
+# (chemin, taille, mtime) -> hash, pour ne pas relire un fichier inchangé
+_fingerprints = {}
+
+
+def file_fingerprint(path, chunk_size=1 << 20):
+    """Hash SHA-256 du contenu d'un fichier."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _fingerprints:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        _fingerprints[memo_key] = digest.hexdigest()
+    return _fingerprints[memo_key]
+
+
+def aggregate_cache_key(path, **params):
+    payload = {
+        "source": file_fingerprint(path),
+        "params": params,
+        "version": CACHE_VERSION,
+    }
+    raw = json.dumps(payload, sort_keys=True).encode()
+    return hashlib.sha256(raw).hexdigest()[:20]
+
+
+def write_parquet_atomic(df, path):
+    """Écrit dans un fichier temporaire puis renomme : jamais de lecture partielle."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+@stage("cached_prepare_aggregated")
+def cached_prepare_aggregated(path, cache_dir=CACHE_DIR, **params):
+    """
+    `prepare_aggregated` sur le fichier `path`, avec cache disque partagé.
+
+    Args:
+        path (str): fichier CSV de transactions nettoyées
+        cache_dir (str): dossier des agrégats en cache
+        **params: paramètres transmis à `prepare_aggregated`
+    """
+    key = aggregate_cache_key(path, **params)
+    cache_path = os.path.join(cache_dir, f"weekly_{key}.parquet")
+
+    if os.path.exists(cache_path):
+        set_cache_status("hit")
+        return pd.read_parquet(cache_path)
+
+    set_cache_status("miss")
+    weekly = prepare_aggregated(pd.read_csv(path), **params)
+    write_parquet_atomic(weekly, cache_path)
+    return weekly
@@ -1,21 +1,52 @@
+import os
+
 import pandas as pd
 
+from src.instrumentation import stage
+
+
+def _is_path(df):
+    """Un chemin de fichier à la place d'un DataFrame active le backend SQL."""
+    return isinstance(df, (str, os.PathLike))
 
+
+@stage("compute_seasonality")
 def compute_seasonality(df, selected_families):
-    df = df.copy()
-    df["month"] = pd.to_datetime(df["date"]).dt.to_period("M").astype(str)
+    if _is_path(df):
+        from src.sql_backend import compute_seasonality_sql
+
+        return compute_seasonality_sql(df, selected_families)
+
+    # df est partagé (lecture seule) : filtrage d'abord, puis seule la clé mois
+    # est dérivée, à partir des dates distinctes ; le libellé texte n'est
+    # construit que sur le résultat
+    filtered = df.loc[df["family"].isin(selected_families), ["date", "family"]]
+    codes, dates = pd.factorize(filtered["date"])
+    month = pd.Series(
+        pd.to_datetime(dates).to_period("M").array.take(codes, allow_fill=True),
+        index=filtered.index,
+        name="month",
+    )
     seasonality = (
-        df[df["family"].isin(selected_families)]
-        .groupby(["month", "family"])["quantity"]
+        df.loc[filtered.index, "quantity"]
+        .groupby([month, filtered["family"]])
         .sum()
         .reset_index()
     )
+    seasonality["month"] = seasonality["month"].astype(str)
     return seasonality
 
 
+@stage("compute_family_distribution")
 def compute_family_distribution(df, selected_families):
-    df = df.copy()
-    filtered = df[df["family"].isin(selected_families)]
+    if _is_path(df):
+        from src.sql_backend import compute_family_distribution_sql
+
+        return compute_family_distribution_sql(df, selected_families)
+
+    filtered = df.loc[
+        df["family"].isin(selected_families), ["family", "product_label", "quantity"]
+    ]
     grouped = (
         filtered.groupby(["family", "product_label"])["quantity"].sum().reset_index()
     )
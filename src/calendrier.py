@@ -0,0 +1,120 @@
+"""
+Dimension calendaire partagée.
+
+Les attributs calendaires (lundi de la semaine, année/semaine ISO, mois...)
+sont précalculés une seule fois par jour, indexés par une clé entière
+(nombre de jours depuis le 01/01/1970). Toute colonne calendaire s'obtient
+ensuite par une simple indexation NumPy sur ces clés.
+
+Une date manquante (NaT) a la clé `NAT_KEY` : elle est ignorée pour la plage
+de la dimension et ses attributs sont NaN (NaT pour `week_start`).
+"""
+
+import numpy as np
+import pandas as pd
+
+# Plage par défaut : historique + large marge pour les horizons de prévision
+DEFAULT_START = "2015-01-01"
+DEFAULT_END = "2035-12-31"
+
+COLUMNS = ["weekday", "week_start", "year", "month", "iso_year", "iso_week"]
+# Clé d'une date manquante (NaT converti en int64)
+NAT_KEY = np.iinfo(np.int64).min
+
+
+def day_keys(dates):
+    """Clés jour (int64) d'une série/index de dates ; NaT -> `NAT_KEY`."""
+    values = pd.to_datetime(pd.Series(dates)).to_numpy()
+    return values.astype("datetime64[D]").astype(np.int64)
+
+
+def keys_to_dates(keys):
+    """Inverse de `day_keys` : clés jour -> datetime64[ns]."""
+    return (
+        np.asarray(keys, dtype=np.int64)
+        .astype("datetime64[D]")
+        .astype("datetime64[ns]")
+    )
+
+
+class CalendarDimension:
+    def __init__(self, start=DEFAULT_START, end=DEFAULT_END):
+        days = pd.date_range(start=start, end=end, freq="D")
+        iso = days.isocalendar()
+
+        self.start_key = int(day_keys(days[:1])[0])
+        self.end_key = self.start_key + len(days) - 1
+
+        keys = np.arange(self.start_key, self.end_key + 1, dtype=np.int64)
+        weekday = days.weekday.to_numpy().astype(np.int64)
+        self.columns = {
+            "weekday": weekday,
+            "week_start": keys - weekday,
+            "year": days.year.to_numpy().astype(np.int32),
+            "month": days.month.to_numpy().astype(np.int32),
+            "iso_year": iso["year"].to_numpy().astype(np.uint32),
+            "iso_week": iso["week"].to_numpy().astype(np.uint32),
+        }
+
+    def covers(self, keys):
+        """`keys` sans `NAT_KEY` (voir `valid_keys`)."""
+        return len(keys) == 0 or (
+            keys.min() >= self.start_key and keys.max() <= self.end_key
+        )
+
+    def gather(self, column, keys):
+        """Valeurs de `column` pour chaque clé jour."""
+        return self.columns[column][np.asarray(keys) - self.start_key]
+
+
+_calendar = None
+
+
+def valid_keys(keys):
+    """Clés sans les dates manquantes."""
+    keys = np.asarray(keys)
+    return keys[keys != NAT_KEY]
+
+
+def get_calendar(keys=None):
+    """
+    Dimension calendaire du processus, étendue si `keys` sort de la plage.
+    """
+    global _calendar
+    if _calendar is None:
+        _calendar = CalendarDimension()
+    if keys is not None:
+        keys = valid_keys(keys)
+    if keys is not None and not _calendar.covers(keys):
+        start = min(_calendar.start_key, int(keys.min()))
+        end = max(_calendar.end_key, int(keys.max()))
+        _calendar = CalendarDimension(
+            keys_to_dates([start])[0], keys_to_dates([end])[0]
+        )
+    return _calendar
+
+
+def calendar_features(dates, columns=COLUMNS):
+    """
+    DataFrame des attributs calendaires des `dates` (même index que `dates`).
+
+    `week_start` est renvoyé en datetime64 ; les autres colonnes en entiers,
+    ou en flottants avec NaN s'il y a des dates manquantes.
+    """
+    index = dates.index if isinstance(dates, pd.Series) else None
+    keys = day_keys(dates)
+    cal = get_calendar(keys)
+    missing = keys == NAT_KEY
+    has_missing = missing.any()
+    if has_missing:
+        keys = np.where(missing, cal.start_key, keys)
+
+    features = {}
+    for column in columns:
+        values = cal.gather(column, keys)
+        if column == "week_start":
+            values = keys_to_dates(np.where(missing, NAT_KEY, values))
+        elif has_missing:
+            values = np.where(missing, np.nan, values)
+        features[column] = values
+    return pd.DataFrame(features, index=index)
@@ -1,6 +1,7 @@
 import pandas as pd
 import numpy as np
 import os
+from src.instrumentation import stage
 
 
 def check_missing_values(df):
@@ -20,15 +21,21 @@ def handle_missing_values(df):
     return df
 
 
-def handle_outliers(df, col="quantity", threshold=30):
+def handle_outliers(df, col="quantity", threshold=30, mean=None, std=None):
+    """
+    Supprime les lignes dont le z-score dépasse `threshold`.
+    `mean` et `std` sont ceux de df, sauf s'ils sont fournis (ex. statistiques
+    de tout l'historique lors d'une ingestion incrémentale).
+    """
     df = df.copy()
-    mean = df[col].mean()
-    std = df[col].std()
+    mean = df[col].mean() if mean is None else mean
+    std = df[col].std() if std is None else std
     z_scores = (df[col] - mean) / std
     df = df[np.abs(z_scores) <= threshold]
     return df
 
 
+@stage("clean_dataset")
 def clean_dataset(df):
     """
     Pipeline complète : nettoyage des NaN et des valeurs aberrantes par suppression.
@@ -42,22 +49,36 @@ def clean_dataset(df):
 def run_data_cleaning(
     input_path="data/raw/transactions.csv",
     output_path="data/processed/clean_transactions.csv",
+    engine="pandas",
 ):
     """
     Charge les données brutes, les nettoie et les enregistre dans le dossier processed.
+    engine="polars" exécute le nettoyage en plan paresseux Polars (src/polars_engine.py).
     """
-    df_raw = pd.read_csv(input_path)
-    print(f"{len(df_raw)} lignes chargées.")
+    if engine == "polars":
+        from src.polars_engine import clean_dataset_polars
+
+        df_clean = clean_dataset_polars(input_path)
+    else:
+        df_raw = pd.read_csv(input_path)
+        print(f"{len(df_raw)} lignes chargées.")
 
-    df_clean = clean_dataset(df_raw)
+        df_clean = clean_dataset(df_raw)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     df_clean.to_csv(output_path, index=False)
 
 
 if __name__ == "__main__":
-    run_data_cleaning()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Nettoyage des transactions")
+    parser.add_argument("--engine", choices=["pandas", "polars"], default="pandas")
+    args = parser.parse_args()
+
+    run_data_cleaning(engine=args.engine)
     run_data_cleaning(
         input_path="data/raw/transactions_test.csv",
         output_path="data/processed/clean_transactions_test.csv",
+        engine=args.engine,
     )
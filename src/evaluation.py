@@ -0,0 +1,165 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def compute_metrics(df_eval, group_cols=None, y_col="quantity", pred_col="prediction"):
+    """
+    RMSE, MAE et R² par groupe, en une seule passe NumPy.
+
+    Args:
+        df_eval (DataFrame): table longue contenant y_col, pred_col et group_cols
+        group_cols (list): colonnes de regroupement (ex. ['model']), None = global
+
+    Returns:
+        DataFrame: une ligne par groupe, colonnes group_cols + ['n', 'rmse', 'mae', 'r2']
+    """
+    group_cols = list(group_cols or [])
+    if group_cols:
+        codes, groups = pd.MultiIndex.from_frame(df_eval[group_cols]).factorize()
+    else:
+        codes, groups = np.zeros(len(df_eval), dtype=np.int64), None
+    n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+    y = df_eval[y_col].to_numpy(dtype=float)
+    err = df_eval[pred_col].to_numpy(dtype=float) - y
+
+    # Sommes par groupe : n, Σe², Σ|e|, Σy, Σy²
+    n = np.bincount(codes, minlength=n_groups)
+    sse = np.bincount(codes, weights=err**2, minlength=n_groups)
+    sae = np.bincount(codes, weights=np.abs(err), minlength=n_groups)
+    sy = np.bincount(codes, weights=y, minlength=n_groups)
+    syy = np.bincount(codes, weights=y**2, minlength=n_groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sst = syy - sy**2 / n
+        metrics = pd.DataFrame(
+            {"n": n, "rmse": np.sqrt(sse / n), "mae": sae / n, "r2": 1 - sse / sst}
+        )
+
+    if group_cols:
+        keys = pd.DataFrame(groups.tolist(), columns=group_cols)
+        metrics = pd.concat([keys, metrics], axis=1)
+    return metrics
+
+
+######## Leaderboard ########
+
+MODEL_KEYS = ["naive", "xgboost", "prophet"]
+HORIZONS = list(range(4, 25, 4))
+LEADERBOARD_PATH = "models/leaderboard.csv"
+
+
+def predict_family(model_key, family, horizon, df_train_family, path_dir="models"):
+    """Prévision d'une famille par un modèle sauvegardé (ou le modèle naïf)."""
+    from src.modeling import (
+        load_saved_model,
+        load_saved_prophet_model,
+        predict_with_naive,
+        predict_with_prophet,
+        predict_with_xgboost,
+    )
+
+    if model_key == "naive":
+        return predict_with_naive(df_train_family, periods=horizon)
+    if model_key == "xgboost":
+        model = load_saved_model("xgboost", family, path_dir)
+        return predict_with_xgboost(model, horizon, df_train_family, family)
+    model = load_saved_prophet_model(family, path_dir)
+    return predict_with_prophet(model, periods=horizon)
+
+
+def build_predictions(
+    df_train,
+    df_test,
+    model_keys=MODEL_KEYS,
+    horizons=HORIZONS,
+    path_dir="models",
+):
+    """
+    Table longue des prévisions confrontées au test, pour toutes les
+    familles x modèles x horizons.
+
+    Une seule prévision par (famille, modèle), à l'horizon maximal : les
+    horizons plus courts en sont les premières semaines.
+
+    Returns:
+        DataFrame: colonnes ['family', 'model', 'horizon', 'date', 'quantity', 'prediction']
+    """
+    max_horizon = max(horizons)
+    tables = []
+    for family in df_train["family"].unique():
+        df_train_family = df_train[df_train["family"] == family]
+        truth = df_test.loc[df_test["family"] == family, ["date", "quantity"]]
+        for model_key in model_keys:
+            predictions = predict_family(
+                model_key, family, max_horizon, df_train_family, path_dir
+            ).reset_index(drop=True)
+            predictions["step"] = np.arange(1, len(predictions) + 1)
+            evaluated = truth.merge(
+                predictions[["date", "step", "prediction"]], on="date"
+            )
+            for horizon in horizons:
+                tables.append(
+                    evaluated[evaluated["step"] <= horizon].assign(
+                        family=family, model=model_key, horizon=horizon
+                    )
+                )
+
+    columns = ["family", "model", "horizon", "date", "quantity", "prediction"]
+    return pd.concat(tables, ignore_index=True)[columns]
+
+
+def build_leaderboard(predictions):
+    """
+    Métriques de toutes les (famille, modèle, horizon) et rang du modèle
+    (RMSE) au sein de chaque (famille, horizon).
+    """
+    leaderboard = compute_metrics(predictions, ["family", "model", "horizon"])
+    leaderboard["rank"] = (
+        leaderboard.groupby(["family", "horizon"])["rmse"]
+        .rank(method="first")
+        .astype(int)
+    )
+    return leaderboard.sort_values(["family", "horizon", "rank"], ignore_index=True)
+
+
+def recommended_models(leaderboard, horizon=None):
+    """
+    Modèle recommandé par famille : meilleur RMSE à `horizon`, ou meilleur
+    rang moyen sur tous les horizons si `horizon` est None.
+
+    Returns:
+        dict: famille -> clé du modèle
+    """
+    if horizon is not None:
+        best = leaderboard[leaderboard["horizon"] == horizon]
+        best = best.loc[best.groupby("family")["rmse"].idxmin()]
+        return dict(zip(best["family"], best["model"]))
+
+    mean_rank = leaderboard.groupby(["family", "model"])["rank"].mean().reset_index()
+    best = mean_rank.loc[mean_rank.groupby("family")["rank"].idxmin()]
+    return dict(zip(best["family"], best["model"]))
+
+
+def save_leaderboard(leaderboard, path=LEADERBOARD_PATH):
+    leaderboard.to_csv(path, index=False)
+
+
+def load_leaderboard(path=LEADERBOARD_PATH):
+    """Leaderboard persisté, ou None s'il n'a pas encore été calculé."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path)
+
+
+if __name__ == "__main__":
+    from src.aggregate_cache import cached_prepare_aggregated
+
+    df_train = cached_prepare_aggregated("data/processed/clean_transactions.csv")
+    df_test = cached_prepare_aggregated("data/processed/clean_transactions_test.csv")
+    leaderboard = build_leaderboard(build_predictions(df_train, df_test))
+    save_leaderboard(leaderboard)
+    print(leaderboard.to_string(index=False))
+    print(f"✅ Leaderboard sauvegardé sous {LEADERBOARD_PATH}")
@@ -0,0 +1,151 @@
+"""
+Magasin de features mappé en mémoire.
+
+Les matrices de features XGBoost (X), les cibles (y) et les dates de chaque
+famille sont écrites une fois en fichiers .npy, avec un petit index JSON.
+Les lecteurs les ouvrent avec np.load(mmap_mode="r") : aucune copie, et
+toutes les sessions / tous les processus partagent les mêmes pages du cache
+système. Lire les features d'une famille revient à prendre une tranche.
+
+    data/features/
+        index.json
+        X_shirt.npy  y_shirt.npy  dates_shirt.npy
+        ...
+
+L'index est écrit en dernier : un magasin sans index (ou dont l'empreinte
+source ne correspond plus) est reconstruit.
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from src.aggregate_cache import cached_prepare_aggregated, file_fingerprint
+from src.calendrier import day_keys, keys_to_dates
+from src.modeling import FEATURE_COLUMNS, build_training_features
+
+STORE_VERSION = 1
+STORE_DIR = "data/features"
+TRAIN_PATH = "data/processed/clean_transactions.csv"
+# Remises et promotions hebdomadaires, lues par `build_training_features`
+EXOGENOUS_PATHS = ("data/avg_discount.csv", "data/promotion_type.csv")
+
+
+def _save_array_atomic(array, path):
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npy")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def build_feature_store(df, store_dir=STORE_DIR, source=None):
+    """
+    Calcule et écrit les features de chaque famille.
+
+    Args:
+        df (DataFrame): agrégats hebdomadaires (sortie de `prepare_aggregated`)
+        store_dir (str): dossier du magasin
+        source (str): empreinte des données sources, stockée dans l'index
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    series = {}
+    for family in df["family"].unique():
+        features = build_training_features(df, family)
+        slug = family.lower()
+        _save_array_atomic(
+            features[FEATURE_COLUMNS].to_numpy(dtype=np.float32),
+            os.path.join(store_dir, f"X_{slug}.npy"),
+        )
+        _save_array_atomic(
+            features["quantity"].to_numpy(dtype=np.float32),
+            os.path.join(store_dir, f"y_{slug}.npy"),
+        )
+        _save_array_atomic(
+            day_keys(features["date"]), os.path.join(store_dir, f"dates_{slug}.npy")
+        )
+        series[family] = {"slug": slug, "rows": len(features)}
+
+    index = {
+        "version": STORE_VERSION,
+        "source": source,
+        "features": FEATURE_COLUMNS,
+        "series": series,
+    }
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, "index.json"))
+    return FeatureStore(store_dir)
+
+
+class FeatureStore:
+    """Lecture zéro-copie d'un magasin écrit par `build_feature_store`."""
+
+    def __init__(self, store_dir=STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "index.json")) as f:
+            self.index = json.load(f)
+        self.features = self.index["features"]
+        self._arrays = {}
+
+    @property
+    def families(self):
+        return list(self.index["series"])
+
+    def arrays(self, family):
+        """(X, y, clés jour) de la famille, mappés en lecture seule."""
+        if family not in self._arrays:
+            slug = self.index["series"][family]["slug"]
+            self._arrays[family] = tuple(
+                np.load(
+                    os.path.join(self.store_dir, f"{name}_{slug}.npy"), mmap_mode="r"
+                )
+                for name in ("X", "y", "dates")
+            )
+        return self._arrays[family]
+
+    def frame(self, family, start=None, stop=None):
+        """
+        Features de la famille (lignes start:stop) en DataFrame, avec les
+        colonnes 'date' et 'quantity'. Les features restent des vues du mapping.
+        """
+        X, y, dates = self.arrays(family)
+        rows = slice(start, stop)
+        frame = pd.DataFrame(X[rows], columns=self.features, copy=False)
+        frame.insert(0, "date", keys_to_dates(dates[rows]))
+        frame["quantity"] = y[rows]
+        return frame
+
+
+def source_fingerprint(path, exogenous_paths=EXOGENOUS_PATHS):
+    """Empreintes des sources des features : transactions, remises, promotions."""
+    return {p: file_fingerprint(p) for p in (path, *exogenous_paths)}
+
+
+def load_feature_store(path=TRAIN_PATH, store_dir=STORE_DIR):
+    """
+    Ouvre le magasin de features de `path`, en le (re)construisant si absent
+    ou construit à partir d'une autre version des fichiers sources.
+    """
+    source = source_fingerprint(path)
+    index_path = os.path.join(store_dir, "index.json")
+    if os.path.exists(index_path):
+        store = FeatureStore(store_dir)
+        if store.index["source"] == source and store.index["version"] == STORE_VERSION:
+            return store
+    return build_feature_store(
+        cached_prepare_aggregated(path), store_dir, source=source
+    )
+
+
+if __name__ == "__main__":
+    store = load_feature_store()
+    print(f"✅ Features de {len(store.families)} familles dans {store.store_dir}")
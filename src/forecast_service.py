@@ -0,0 +1,298 @@
+"""
+Service local de prévision (HTTP/JSON) au-dessus des fonctions predict_with_*.
+
+- Les modèles sont chargés une fois puis gardés en mémoire (pool "chaud").
+- Les requêtes concurrentes sont regroupées : pour une même (famille, modèle),
+  un seul appel de prédiction est fait sur l'horizon maximal demandé, puis
+  découpé par requête.
+- Avec "intervals": true, une prévision XGBoost reçoit aussi ses bornes
+  P10/P50/P90 (booster multi-quantiles) : un seul appel de prédiction de plus
+  par (famille, lot), quel que soit le nombre de requêtes concernées.
+- GET /metrics expose latences (p50/p95/p99) et débit.
+
+Lancement :
+    python -m src.forecast_service --port 8600
+
+Exemple :
+    curl -X POST localhost:8600/forecast \\
+         -d '{"family": "Shirt", "model": "xgboost", "horizon": 12, "intervals": true}'
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src.aggregate_cache import cached_prepare_aggregated
+from src.modeling import (
+    load_saved_model,
+    load_saved_prophet_model,
+    predict_with_naive,
+    predict_with_prophet,
+    predict_with_xgboost,
+    predict_with_xgboost_quantiles,
+)
+
+MODELS = ("naive", "xgboost", "prophet")
+TRAIN_PATH = "data/processed/clean_transactions.csv"
+
+
+class ModelPool:
+    """Modèles et historiques d'entraînement gardés en mémoire."""
+
+    def __init__(self, train_path=TRAIN_PATH, model_dir="models"):
+        self.train_path = train_path
+        self.model_dir = model_dir
+        self._history = None
+        self._lock = threading.Lock()
+
+    def history(self, family):
+        with self._lock:
+            if self._history is None:
+                self._history = cached_prepare_aggregated(self.train_path)
+        return self._history[self._history["family"] == family]
+
+    def get(self, model_name, family):
+        # Modèles gardés en mémoire par les fonctions de chargement, qui ne
+        # relisent que ceux changés par une nouvelle version publiée
+        with self._lock:
+            if model_name in ("xgboost", "xgboost_quantile"):
+                return load_saved_model(model_name, family, self.model_dir)
+            if model_name == "prophet":
+                return load_saved_prophet_model(family, self.model_dir)
+            return None
+
+    def predict(self, model_name, family, horizon):
+        """Un appel de prédiction pour (modèle, famille) sur `horizon` semaines."""
+        if model_name == "naive":
+            return predict_with_naive(self.history(family), periods=horizon)
+        model = self.get(model_name, family)
+        if model_name == "xgboost":
+            return predict_with_xgboost(model, horizon, self.history(family), family)
+        return predict_with_prophet(model, periods=horizon)
+
+    def predict_intervals(self, family, horizon):
+        """Bornes P10/P50/P90 XGBoost : un appel pour tout l'horizon."""
+        model = self.get("xgboost_quantile", family)
+        return predict_with_xgboost_quantiles(
+            model, horizon, self.history(family), family
+        )
+
+
+class ServiceMetrics:
+    def __init__(self, window=1000):
+        self._latencies = deque(maxlen=window)
+        self._timestamps = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.predict_calls = 0
+        self.errors = 0
+
+    def record_request(self, latency):
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency)
+            self._timestamps.append(time.time())
+
+    def record_errors(self, n):
+        with self._lock:
+            self.errors += n
+
+    def record_batch(self, n_calls):
+        with self._lock:
+            self.batches += 1
+            self.predict_calls += n_calls
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            timestamps = list(self._timestamps)
+            snapshot = {
+                "requests": self.requests,
+                "batches": self.batches,
+                "predict_calls": self.predict_calls,
+                "errors": self.errors,
+            }
+        if len(latencies):
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            snapshot["latency_ms"] = {"p50": p50, "p95": p95, "p99": p99}
+        if len(timestamps) > 1 and timestamps[-1] > timestamps[0]:
+            span = timestamps[-1] - timestamps[0]
+            snapshot["throughput_rps"] = (len(timestamps) - 1) / span
+        if self.batches:
+            snapshot["requests_per_predict_call"] = self.requests / max(
+                self.predict_calls, 1
+            )
+        return snapshot
+
+
+class ForecastBatcher:
+    """
+    Regroupe les requêtes arrivées pendant `max_wait` secondes (au plus
+    `max_batch`) et les exécute par (famille, modèle).
+    """
+
+    def __init__(self, pool, metrics, max_wait=0.005, max_batch=256):
+        self.pool = pool
+        self.metrics = metrics
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, family, model_name, horizon, intervals=False):
+        if model_name not in MODELS:
+            raise ValueError(f"Modèle inconnu : {model_name}")
+        if intervals and model_name != "xgboost":
+            raise ValueError("Intervalles disponibles pour le modèle xgboost seulement")
+        future = Future()
+        self._queue.put((family, model_name, int(horizon), bool(intervals), future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            groups = {}
+            for family, model_name, horizon, intervals, future in batch:
+                groups.setdefault((family, model_name), []).append(
+                    (horizon, intervals, future)
+                )
+
+            predict_calls = 0
+            for (family, model_name), items in groups.items():
+                max_horizon = max(h for h, _, _ in items)
+                try:
+                    forecast = self.pool.predict(model_name, family, max_horizon)
+                    predict_calls += 1
+                    forecast = forecast.reset_index(drop=True)
+                    # Les bornes sont calculées une fois pour tout le groupe
+                    if any(intervals for _, intervals, _ in items):
+                        bands = self.pool.predict_intervals(family, max_horizon)
+                        predict_calls += 1
+                        with_bands = forecast.merge(bands, on="date", how="left")
+                except Exception as exc:
+                    self.metrics.record_errors(len(items))
+                    for _, _, future in items:
+                        future.set_exception(exc)
+                    continue
+                for horizon, intervals, future in items:
+                    result = with_bands if intervals else forecast
+                    future.set_result(result.head(horizon))
+            self.metrics.record_batch(predict_calls)
+
+
+def forecast_to_records(forecast):
+    """Lignes JSON : date, prediction et, s'il y en a, les bornes p10/p50/p90."""
+    values = [column for column in forecast.columns if column != "date"]
+    return [
+        {"date": row[0].strftime("%Y-%m-%d"), **dict(zip(values, map(float, row[1:])))}
+        for row in forecast[["date", *values]].itertuples(index=False)
+    ]
+
+
+def make_handler(batcher, metrics, timeout=120):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, metrics.snapshot())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/forecast":
+                self._send(404, {"error": "not found"})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                # Une requête simple ou une liste {"requests": [...]}
+                requests = payload.get("requests", [payload])
+                futures = [
+                    batcher.submit(
+                        r["family"],
+                        r["model"],
+                        r.get("horizon", 12),
+                        r.get("intervals", False),
+                    )
+                    for r in requests
+                ]
+                results = [
+                    {**r, "forecast": forecast_to_records(f.result(timeout))}
+                    for r, f in zip(requests, futures)
+                ]
+            except (KeyError, ValueError) as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            except Exception as exc:
+                self._send(500, {"error": str(exc)})
+                return
+
+            latency = time.perf_counter() - start
+            for _ in requests:
+                metrics.record_request(latency)
+            if "requests" in payload:
+                self._send(200, {"results": results})
+            else:
+                self._send(200, results[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return ForecastHandler
+
+
+class ForecastServer(ThreadingHTTPServer):
+    # File d'attente TCP assez longue pour des rafales de clients concurrents
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def serve(host="127.0.0.1", port=8600, max_wait=0.005, max_batch=256):
+    pool = ModelPool()
+    metrics = ServiceMetrics()
+    batcher = ForecastBatcher(pool, metrics, max_wait=max_wait, max_batch=max_batch)
+    server = ForecastServer((host, port), make_handler(batcher, metrics))
+    print(f"Service de prévision sur http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service local de prévision")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=256)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.max_wait_ms / 1000, args.max_batch)
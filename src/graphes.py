@@ -1,9 +1,13 @@
+import numpy as np
+import pandas as pd
 import networkx as nx
 from itertools import combinations
 from collections import Counter
 from networkx.algorithms.community import louvain_communities
+from src.instrumentation import stage
 
 
+@stage("build_graph_cooccurrence")
 def build_graph_cooccurrence(df, min_edge_weight=2):
     """
     Construit un graphe de co-achats entre produits.
@@ -12,7 +16,12 @@ def build_graph_cooccurrence(df, min_edge_weight=2):
     G = nx.Graph()
 
     # Étape 1 : pour chaque panier (client + date), extraire les produits
-    grouped = df.groupby(["client_id", "date"])["product_label"].apply(list)
+    # (numéro de panier puis découpage, dans l'ordre des paniers et des lignes)
+    basket = df.groupby(["client_id", "date"]).ngroup().to_numpy()
+    rows = np.flatnonzero(pd.notna(basket))  # clés manquantes ignorées, comme groupby
+    order = rows[np.argsort(basket[rows], kind="stable")]
+    labels = df["product_label"].to_numpy(dtype=object)[order]
+    grouped = np.split(labels, np.flatnonzero(np.diff(basket[order])) + 1)
 
     # Étape 2 : générer les paires de produits
     edges = []
@@ -31,6 +40,7 @@ def build_graph_cooccurrence(df, min_edge_weight=2):
     return G
 
 
+@stage("compute_louvain_communities")
 def compute_louvain_communities(G: nx.Graph):
     """
     Détection de communautés avec l’algorithme de Louvain (via NetworkX >= 3.0)
@@ -0,0 +1,221 @@
+"""
+Ingestion incrémentale des transactions.
+
+Chaque nouveau lot brut (par ex. une journée) est ajouté comme partition,
+nettoyé seul, puis fusionné dans les agrégats hebdomadaires partiels
+(sommes et effectifs, voir `weekly_partial` dans src/modeling.py). Rien
+n'est relu de l'historique des transactions : le coût d'une mise à jour
+dépend de la taille du lot (plus la taille des agrégats, une ligne par
+famille et par semaine).
+
+    data/ingest/
+        state.json                  partitions ingérées, moments de quantité
+        raw/part-00000.parquet      lots bruts, tels que reçus
+        clean/part-00000.parquet    lots nettoyés
+        partial/part-00000.parquet  agrégats hebdomadaires partiels du lot
+        weekly_partial-00042.parquet  partiels fusionnés des 42 premiers lots
+
+Les fichiers d'une partition sont écrits avant state.json, qui valide le
+lot : un lot interrompu avant n'est pas compté et sa partition sera réécrite
+par le lot suivant. Les agrégats ne sont jamais lus sans state.json : la
+fusion la plus récente (qui couvre les N premiers lots, N dans son nom) est
+complétée par les partiels des lots validés suivants. Une fusion interrompue
+n'est donc qu'un raccourci manquant, jamais un lot compté deux fois.
+
+Le seuil de valeurs aberrantes (z-score) utilise la moyenne et l'écart-type
+de toutes les quantités ingérées, lot courant compris, comme le nettoyage du
+fichier complet ; les lots déjà ingérés ne sont pas re-filtrés.
+
+    python -m src.ingestion data/raw/transactions.csv      # historique initial
+    python -m src.ingestion data/raw/2024-08-12.csv        # lot du jour
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import tempfile
+
+import pandas as pd
+
+from src.aggregate_cache import file_fingerprint, write_parquet_atomic
+from src.data_cleaning import handle_missing_values, handle_outliers
+from src.instrumentation import stage
+from src.modeling import finalize_weekly, merge_weekly_partials, weekly_partial
+
+INGEST_DIR = "data/ingest"
+STATE_VERSION = 1
+
+
+def empty_state():
+    return {
+        "version": STATE_VERSION,
+        "partitions": [],
+        "quantity_moments": {"n": 0, "sum": 0.0, "sum_sq": 0.0},
+    }
+
+
+def load_state(root=INGEST_DIR):
+    path = os.path.join(root, "state.json")
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, root=INGEST_DIR):
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(root, "state.json"))
+
+
+def partition_path(root, kind, partition_id):
+    return os.path.join(root, kind, f"part-{partition_id:05d}.parquet")
+
+
+def merged_path(root, n_partitions):
+    """Partiels fusionnés des `n_partitions` premières partitions."""
+    return os.path.join(root, f"weekly_partial-{n_partitions:05d}.parquet")
+
+
+def load_weekly_partial(root=INGEST_DIR, state=None):
+    """
+    Partiels hebdomadaires fusionnés de toutes les partitions validées par
+    state.json : dernière fusion couvrant au plus ces partitions, plus les
+    partiels des partitions suivantes.
+    """
+    if state is None:
+        state = load_state(root)
+    n_partitions = len(state["partitions"])
+    covered = [
+        int(os.path.basename(path)[len("weekly_partial-") : -len(".parquet")])
+        for path in glob.glob(os.path.join(root, "weekly_partial-*.parquet"))
+    ]
+    start = max((n for n in covered if n <= n_partitions), default=0)
+
+    partials = [pd.read_parquet(merged_path(root, start))] if start else []
+    partials += [
+        pd.read_parquet(partition_path(root, "partial", i))
+        for i in range(start, n_partitions)
+    ]
+    if len(partials) == 1:
+        return partials[0]
+    return merge_weekly_partials(partials)
+
+
+def update_moments(moments, values):
+    """Ajoute des valeurs aux moments (n, somme, somme des carrés)."""
+    values = values.astype(float)
+    return {
+        "n": moments["n"] + len(values),
+        "sum": moments["sum"] + float(values.sum()),
+        "sum_sq": moments["sum_sq"] + float((values**2).sum()),
+    }
+
+
+def moments_mean_std(moments):
+    """Moyenne et écart-type (ddof=1, comme pandas) à partir des moments."""
+    n = moments["n"]
+    mean = moments["sum"] / n
+    var = (moments["sum_sq"] - n * mean**2) / (n - 1) if n > 1 else float("nan")
+    return mean, math.sqrt(max(var, 0.0))
+
+
+def clean_batch(batch, moments, col="quantity", threshold=30):
+    """
+    Nettoie un lot seul : NaN supprimés, puis valeurs aberrantes filtrées avec
+    les statistiques de tout l'historique ingéré.
+
+    Returns:
+        Tuple[DataFrame, dict]: lot nettoyé, moments mis à jour
+    """
+    batch = handle_missing_values(batch)
+    moments = update_moments(moments, batch[col])
+    mean, std = moments_mean_std(moments)
+    return handle_outliers(batch, col, threshold, mean=mean, std=std), moments
+
+
+@stage("ingest_batch")
+def ingest_batch(path, root=INGEST_DIR):
+    """
+    Ajoute le fichier de transactions brutes `path` comme nouvelle partition.
+
+    Un fichier déjà ingéré (même contenu) est ignoré.
+
+    Returns:
+        dict: description de la partition, ou None si déjà ingérée
+    """
+    source = file_fingerprint(path)
+    state = load_state(root)
+    if any(p["source"] == source for p in state["partitions"]):
+        return None
+
+    partition_id = len(state["partitions"])
+    raw = pd.read_csv(path)
+    write_parquet_atomic(raw, partition_path(root, "raw", partition_id))
+
+    clean, moments = clean_batch(raw, state["quantity_moments"])
+    write_parquet_atomic(clean, partition_path(root, "clean", partition_id))
+
+    # Agrégats : seuls les partiels du lot sont calculés (fusionnés plus bas)
+    write_parquet_atomic(
+        weekly_partial(clean), partition_path(root, "partial", partition_id)
+    )
+
+    partition = {
+        "id": partition_id,
+        "file": os.path.basename(path),
+        "source": source,
+        "rows_raw": len(raw),
+        "rows_clean": len(clean),
+    }
+    state["partitions"].append(partition)
+    state["quantity_moments"] = moments
+    # Le lot est validé ici, avec ses fichiers de partition
+    save_state(state, root)
+
+    # Raccourci : fusion de tous les lots validés, puis suppression des
+    # fusions plus anciennes
+    n_partitions = len(state["partitions"])
+    write_parquet_atomic(
+        load_weekly_partial(root, state), merged_path(root, n_partitions)
+    )
+    for path in glob.glob(os.path.join(root, "weekly_partial-*.parquet")):
+        if path != merged_path(root, n_partitions):
+            os.remove(path)
+    return partition
+
+
+def load_weekly_aggregates(root=INGEST_DIR):
+    """Agrégats hebdomadaires de tous les lots ingérés (format `prepare_aggregated`)."""
+    return finalize_weekly(load_weekly_partial(root))
+
+
+def load_clean_transactions(root=INGEST_DIR):
+    """Transactions nettoyées de toutes les partitions, dans l'ordre d'ingestion."""
+    paths = sorted(glob.glob(os.path.join(root, "clean", "part-*.parquet")))
+    n_partitions = len(load_state(root)["partitions"])
+    return pd.concat(
+        [pd.read_parquet(path) for path in paths[:n_partitions]], ignore_index=True
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion incrémentale")
+    parser.add_argument("paths", nargs="+", help="fichiers CSV de transactions brutes")
+    parser.add_argument("--root", default=INGEST_DIR)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        partition = ingest_batch(path, args.root)
+        if partition is None:
+            print(f"⏭️  {path} déjà ingéré")
+        else:
+            print(
+                f"✅ {path} -> partition {partition['id']} "
+                f"({partition['rows_clean']}/{partition['rows_raw']} lignes gardées)"
+            )
+    weekly = load_weekly_aggregates(args.root)
+    print(f"Agrégats hebdomadaires : {len(weekly)} lignes famille x semaine")
@@ -0,0 +1,237 @@
+"""
+Instrumentation légère des étapes du pipeline et du dashboard.
+
+Chaque étape décorée par `@stage("nom")` (ou entourée de `with span("nom")`)
+enregistre sa durée, son pic mémoire Python (tracemalloc) et, pour les
+fonctions en cache, si l'appel a été un hit ou un miss.
+
+Les mesures sont rattachées au collecteur actif du thread courant (un par
+exécution de page, voir `start_run`). Sans collecteur actif, le décorateur se
+réduit à un test et à l'appel direct de la fonction.
+
+Activation : variable d'environnement SALES_PERF=1, ou `start_run(enabled=True)`.
+
+Mémoire : tracemalloc est global au processus (pic commun à tous les
+threads) et ralentit toutes les allocations. Il n'est actif que pendant une
+étape de plus haut niveau mesurée, et pour un seul thread à la fois ; les
+étapes d'un autre thread pendant ce temps n'ont pas de pic mémoire (None).
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ENV_FLAG = "SALES_PERF"
+
+
+class _State(threading.local):
+    # Valeurs par défaut par thread : pas d'exception sur le chemin désactivé
+    collector = None
+    stack = ()
+    # Profondeur des étapes qui mesurent la mémoire dans ce thread
+    memory_depth = 0
+    started_tracing = False
+
+
+_local = _State()
+# Tenu par le thread qui mesure la mémoire (tracemalloc.reset_peak est global)
+_memory_lock = threading.Lock()
+
+
+class Collector:
+    """Mesures d'une exécution (une relance de page Streamlit, un script...)."""
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.records = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def to_json(self):
+        return json.dumps(self.records, indent=2, default=str)
+
+    def to_chrome_trace(self):
+        """Format Chrome trace (chrome://tracing, Perfetto)."""
+        events = [
+            {
+                "name": r["name"],
+                "ph": "X",
+                "ts": r["start_ms"] * 1000,
+                "dur": r["duration_ms"] * 1000,
+                "pid": os.getpid(),
+                "tid": r["thread"],
+                "args": {"peak_mb": r["peak_mb"], "cache": r["cache"]},
+            }
+            for r in self.records
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+def env_enabled():
+    return os.environ.get(ENV_FLAG, "") not in ("", "0")
+
+
+def start_run(enabled=None, memory=True):
+    """
+    Démarre un nouveau collecteur pour le thread courant et le renvoie.
+    Renvoie None (instrumentation désactivée) si `enabled` est faux.
+    """
+    if enabled is None:
+        enabled = env_enabled()
+    _local.collector = Collector(memory=memory) if enabled else None
+    _local.stack = []
+    return _local.collector
+
+
+def current_collector():
+    return _local.collector
+
+
+def propagate(fn):
+    """
+    Rattache `fn` au collecteur du thread appelant (pour les pools de threads).
+    """
+    collector = current_collector()
+    if collector is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _local.collector, _local.stack = collector, []
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.collector = None
+
+    return wrapper
+
+
+def _acquire_memory():
+    """Vrai si ce thread peut mesurer la mémoire (sans jamais attendre)."""
+    if _local.memory_depth:
+        _local.memory_depth += 1
+        return True
+    if not _memory_lock.acquire(blocking=False):
+        return False
+    _local.memory_depth = 1
+    _local.started_tracing = not tracemalloc.is_tracing()
+    if _local.started_tracing:
+        tracemalloc.start()
+    return True
+
+
+def _release_memory():
+    _local.memory_depth -= 1
+    if _local.memory_depth == 0:
+        # Arrêt dès la fin de l'étape de plus haut niveau (sauf si tracemalloc
+        # était déjà actif avant nous)
+        if _local.started_tracing:
+            tracemalloc.stop()
+        _memory_lock.release()
+
+
+def set_cache_status(status):
+    """Indique "hit" ou "miss" pour l'étape en cours (si instrumentée)."""
+    stack = _local.stack
+    if stack:
+        stack[-1]["record"]["cache"] = status
+
+
+@contextmanager
+def span(name):
+    """Mesure le bloc `with` comme une étape nommée."""
+    collector = current_collector()
+    if collector is None:
+        yield None
+        return
+
+    track_memory = collector.memory and _acquire_memory()
+
+    record = {"name": name, "cache": None, "thread": threading.get_ident()}
+    frame = {"record": record, "peak_floor": 0}
+    if track_memory:
+        # reset_peak est global : on mémorise le pic courant pour le parent
+        frame["base"], frame["parent_peak"] = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+    _local.stack.append(frame)
+
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        end = time.perf_counter()
+        _local.stack.pop()
+        record["start_ms"] = (start - collector.origin) * 1000
+        record["duration_ms"] = (end - start) * 1000
+        record["peak_mb"] = None
+        if track_memory:
+            peak = max(tracemalloc.get_traced_memory()[1], frame["peak_floor"])
+            record["peak_mb"] = round(max(peak - frame["base"], 0) / 1e6, 3)
+            # Le parent garde le maximum de son pic et de celui de l'enfant
+            if _local.stack:
+                parent = _local.stack[-1]
+                parent["peak_floor"] = max(
+                    parent["peak_floor"], frame["parent_peak"], peak
+                )
+            _release_memory()
+        collector.add(record)
+
+
+def stage(name=None):
+    """
+    Décorateur : mesure chaque appel de la fonction comme une étape.
+    """
+
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _local.collector is None:
+                return fn(*args, **kwargs)
+            with span(label):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def cached_stage(cache_decorator, name=None):
+    """
+    Comme `stage`, pour une fonction mise en cache par `cache_decorator`
+    (ex. st.cache_data) : l'étape est marquée "miss" si le corps de la
+    fonction s'exécute, "hit" sinon.
+    """
+
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            set_cache_status("miss")
+            return fn(*args, **kwargs)
+
+        cached = cache_decorator(body)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _local.collector is None:
+                return cached(*args, **kwargs)
+            with span(label) as record:
+                record["cache"] = "hit"
+                return cached(*args, **kwargs)
+
+        if hasattr(cached, "clear"):
+            wrapper.clear = cached.clear
+        return wrapper
+
+    return decorate
@@ -0,0 +1,143 @@
+"""
+Résumés de KPIs fusionnables par partition.
+
+Chaque partition (par défaut une famille de produits) garde des sommes et
+comptages exacts, plus un sketch HyperLogLog pour les clients et produits
+distincts. Les résumés se fusionnent en quelques microsecondes, quel que
+soit le volume de transactions d'origine.
+"""
+
+import numpy as np
+import pandas as pd
+
+# 2^14 registres : erreur relative typique ~0.8 %
+HLL_PRECISION = 14
+
+_POWERS_OF_TWO = np.array([1 << i for i in range(64)], dtype=np.uint64)
+
+
+def _hash_values(values):
+    """Hash 64 bits déterministe d'une série de valeurs."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def _register_updates(hashes, precision):
+    """Index de registre et rang (position du premier bit à 1) de chaque hash."""
+    shift = np.uint64(64 - precision)
+    idx = (hashes >> shift).astype(np.int64)
+    low = hashes & np.uint64((1 << (64 - precision)) - 1)
+    # Longueur en bits exacte, sans passer par un log flottant
+    bit_length = np.searchsorted(_POWERS_OF_TWO, low, side="right")
+    rank = (64 - precision) - bit_length + 1
+    return idx, rank.astype(np.uint8)
+
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = (
+            registers
+            if registers is not None
+            else np.zeros(1 << precision, dtype=np.uint8)
+        )
+
+    def add(self, values):
+        idx, rank = _register_updates(_hash_values(values), self.precision)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(
+                "Impossible de fusionner des HLL de précisions différentes"
+            )
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def estimate(self):
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+
+        # Correction petites cardinalités (linear counting)
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros > 0:
+            return m * np.log(m / zeros)
+        return raw
+
+
+class KpiSketch:
+    def __init__(
+        self, transactions=0, revenue=0.0, quantity=0, clients=None, products=None
+    ):
+        """
+        Résumé d'une partition : comptages et sommes exacts, distincts approchés.
+        """
+        self.transactions = transactions
+        self.revenue = revenue
+        self.quantity = quantity
+        self.clients = clients or HyperLogLog()
+        self.products = products or HyperLogLog()
+
+    def merge(self, other):
+        return KpiSketch(
+            transactions=self.transactions + other.transactions,
+            revenue=self.revenue + other.revenue,
+            quantity=self.quantity + other.quantity,
+            clients=self.clients.merge(other.clients),
+            products=self.products.merge(other.products),
+        )
+
+    def to_kpis(self):
+        """Même format que `app.utils.get_kpis`."""
+        return {
+            "transactions": self.transactions,
+            "produits_uniques": int(round(self.products.estimate())),
+            "clients": int(round(self.clients.estimate())),
+            "revenu_total": self.revenue,
+            "quantite_totale": self.quantity,
+            # Produits et clients distincts estimés (HyperLogLog)
+            "approche": True,
+        }
+
+
+def _grouped_registers(codes, n_groups, values, precision):
+    registers = np.zeros((n_groups, 1 << precision), dtype=np.uint8)
+    idx, rank = _register_updates(_hash_values(values), precision)
+    np.maximum.at(registers, (codes, idx), rank)
+    return registers
+
+
+def build_kpi_sketches(df, by="family", precision=HLL_PRECISION):
+    """
+    Construit un KpiSketch par valeur de la colonne `by`, en une passe vectorisée.
+
+    Returns:
+        Dict[str, KpiSketch]: résumés par partition
+    """
+    codes, keys = pd.factorize(df[by], sort=True, use_na_sentinel=False)
+
+    n = len(keys)
+    transactions = np.bincount(codes, minlength=n)
+    revenue = df.groupby(codes)["revenue"].sum().reindex(range(n), fill_value=0)
+    quantity = df.groupby(codes)["quantity"].sum().reindex(range(n), fill_value=0)
+    clients = _grouped_registers(codes, n, df["client_id"], precision)
+    products = _grouped_registers(codes, n, df["product_id"], precision)
+
+    return {
+        key: KpiSketch(
+            transactions=int(transactions[i]),
+            revenue=float(revenue.iloc[i]),
+            quantity=int(quantity.iloc[i]),
+            clients=HyperLogLog(precision, clients[i]),
+            products=HyperLogLog(precision, products[i]),
+        )
+        for i, key in enumerate(keys)
+    }
+
+
+def merge_kpi_sketches(sketches):
+    """Fusionne une liste de KpiSketch (par ex. les familles sélectionnées)."""
+    merged = KpiSketch()
+    for sketch in sketches:
+        merged = merged.merge(sketch)
+    return merged
@@ -0,0 +1,291 @@
+"""
+Format « bundle » des modèles sauvegardés.
+
+- XGBoost : format binaire natif (UBJSON, Booster.save_model), sans pickle.
+- Prophet : paramètres du modèle sans l'historique d'entraînement (seule la
+  dernière ligne est gardée, elle suffit à `predict`), en types JSON natifs
+  (pas de DataFrame sérialisé dans le JSON), compressés gzip.
+- manifest.json décrit chaque modèle (fichier, format, taille, empreinte
+  SHA-256, version de la bibliothèque) et porte une version de format.
+
+Les fonctions de chargement de src/modeling.py lisent le bundle en priorité,
+puis les anciens fichiers (.pkl joblib, .json Prophet complet).
+
+Conversion des anciens fichiers d'un dossier :
+    python -m src.model_bundle --models-dir models
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BUNDLE_VERSION = 1
+MANIFEST = "manifest.json"
+
+XGBOOST_FORMAT = "xgboost-ubj"
+PROPHET_FORMAT = "prophet-params-json-gz"
+
+# (dossier, mtime du manifest) -> manifest, pour ne pas le relire à chaque modèle
+_manifests = {}
+
+
+def bundle_key(model_name, family):
+    return f"{model_name.lower()}/{family.lower()}"
+
+
+def _write_atomic(data, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_manifest(path_dir="models"):
+    """Manifest du dossier (vide s'il n'existe pas)."""
+    path = os.path.join(path_dir, MANIFEST)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {"version": BUNDLE_VERSION, "models": {}}
+
+    key = (os.path.abspath(path_dir), mtime)
+    if key not in _manifests:
+        with open(path) as f:
+            manifest = json.load(f)
+        if manifest.get("version", 0) > BUNDLE_VERSION:
+            raise ValueError(
+                f"Bundle version {manifest['version']} non supportée "
+                f"(max {BUNDLE_VERSION}) : {path}"
+            )
+        _manifests[key] = manifest
+    return _manifests[key]
+
+
+def _register(path_dir, model_name, family, filename, fmt, library_version):
+    manifest = read_manifest(path_dir)
+    models = dict(manifest["models"])
+    with open(os.path.join(path_dir, filename), "rb") as f:
+        data = f.read()
+    models[bundle_key(model_name, family)] = {
+        "model": model_name,
+        "family": family,
+        "file": filename,
+        "format": fmt,
+        "bytes": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "library_version": library_version,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    manifest = {"version": BUNDLE_VERSION, "models": models}
+    _write_atomic(
+        json.dumps(manifest, indent=2, sort_keys=True).encode(),
+        os.path.join(path_dir, MANIFEST),
+    )
+
+
+def save_xgboost_bundle(model, model_name, family, path_dir="models"):
+    """Sauvegarde un modèle XGBoost (sklearn) au format binaire natif."""
+    import xgboost
+
+    os.makedirs(path_dir, exist_ok=True)
+    filename = f"model_{model_name.lower()}_{family.lower()}.ubj"
+    fd, tmp_path = tempfile.mkstemp(dir=path_dir, suffix=".ubj")
+    os.close(fd)
+    model.save_model(tmp_path)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, os.path.join(path_dir, filename))
+    _register(
+        path_dir, model_name, family, filename, XGBOOST_FORMAT, xgboost.__version__
+    )
+
+
+def _seconds(dates):
+    return pd.to_datetime(dates).to_numpy("datetime64[s]").astype(np.int64).tolist()
+
+
+def _from_seconds(seconds):
+    return pd.to_datetime(np.asarray(seconds, dtype=np.int64), unit="s")
+
+
+def _frame_payload(df):
+    """DataFrame -> colonnes en listes (dates en secondes epoch)."""
+    if df is None:
+        return None
+    dates = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+    return {
+        "index": df.index.tolist(),
+        "index_name": df.index.name,
+        "columns_name": df.columns.name,
+        "dates": dates,
+        "columns": {
+            str(col): _seconds(df[col]) if col in dates else df[col].tolist()
+            for col in df.columns
+        },
+    }
+
+
+def _frame_from_payload(payload):
+    if payload is None:
+        return None
+    df = pd.DataFrame(
+        {
+            col: _from_seconds(values) if col in payload["dates"] else values
+            for col, values in payload["columns"].items()
+        },
+        index=pd.Index(payload["index"], name=payload["index_name"]),
+    )
+    df.columns.name = payload["columns_name"]
+    return df
+
+
+def prophet_payload(model):
+    """
+    Paramètres d'un modèle Prophet ajusté, en types JSON natifs.
+
+    L'historique d'entraînement est réduit à sa dernière ligne (`predict`
+    n'en utilise que la dernière date) et la tendance in-sample des
+    paramètres n'est pas gardée. Les dates sont en secondes epoch.
+    """
+    from prophet.serialize import SIMPLE_ATTRIBUTES
+
+    payload = {attr: getattr(model, attr) for attr in SIMPLE_ATTRIBUTES}
+    payload["start"] = _seconds([model.start])[0]
+    payload["t_scale"] = model.t_scale.total_seconds()
+    payload["changepoints"] = _seconds(model.changepoints)
+    payload["history_dates"] = _seconds(model.history_dates)
+    payload["train_holiday_names"] = (
+        None
+        if model.train_holiday_names is None
+        else model.train_holiday_names.tolist()
+    )
+    payload["holidays"] = _frame_payload(model.holidays)
+    payload["history"] = _frame_payload(model.history.tail(1))
+    payload["train_component_cols"] = _frame_payload(model.train_component_cols)
+    payload["changepoints_t"] = np.asarray(model.changepoints_t).tolist()
+    payload["seasonalities"] = list(model.seasonalities.items())
+    payload["extra_regressors"] = list(model.extra_regressors.items())
+    payload["params"] = {
+        name: np.asarray(value).tolist()
+        for name, value in model.params.items()
+        if name != "trend"
+    }
+    return payload
+
+
+def prophet_from_payload(payload):
+    """Modèle Prophet prêt à prédire, reconstruit depuis `prophet_payload`."""
+    from collections import OrderedDict
+
+    from prophet import Prophet
+    from prophet.serialize import SIMPLE_ATTRIBUTES
+
+    model = Prophet()
+    for attr in SIMPLE_ATTRIBUTES:
+        setattr(model, attr, payload[attr])
+    model.start = _from_seconds([payload["start"]])[0]
+    model.t_scale = pd.Timedelta(seconds=payload["t_scale"])
+    model.changepoints = pd.Series(_from_seconds(payload["changepoints"]), name="ds")
+    model.history_dates = pd.Series(_from_seconds(payload["history_dates"]), name="ds")
+    if payload["train_holiday_names"] is not None:
+        model.train_holiday_names = pd.Series(payload["train_holiday_names"])
+    model.holidays = _frame_from_payload(payload["holidays"])
+    model.history = _frame_from_payload(payload["history"])
+    model.train_component_cols = _frame_from_payload(payload["train_component_cols"])
+    model.changepoints_t = np.array(payload["changepoints_t"])
+    model.seasonalities = OrderedDict(payload["seasonalities"])
+    model.extra_regressors = OrderedDict(payload["extra_regressors"])
+    model.params = {name: np.array(value) for name, value in payload["params"].items()}
+    model.fit_kwargs = {}
+    model.stan_backend = None
+    model.stan_fit = None
+    return model
+
+
+def save_prophet_bundle(model, family, path_dir="models"):
+    """Sauvegarde un modèle Prophet sous forme de paramètres compressés."""
+    import prophet
+
+    os.makedirs(path_dir, exist_ok=True)
+    filename = f"model_prophet_{family.lower()}.json.gz"
+    raw = json.dumps(prophet_payload(model), separators=(",", ":")).encode()
+    _write_atomic(gzip.compress(raw, mtime=0), os.path.join(path_dir, filename))
+    _register(
+        path_dir, "prophet", family, filename, PROPHET_FORMAT, prophet.__version__
+    )
+
+
+def load_bundle_model(model_name, family, path_dir="models"):
+    """
+    Charge un modèle décrit par le manifest, ou renvoie None s'il n'y figure
+    pas (l'appelant se replie alors sur l'ancien format).
+    """
+    entry = read_manifest(path_dir)["models"].get(bundle_key(model_name, family))
+    if entry is None:
+        return None
+    path = os.path.join(path_dir, entry["file"])
+
+    if entry["format"] == XGBOOST_FORMAT:
+        from xgboost import XGBRegressor
+
+        model = XGBRegressor()
+        model.load_model(path)
+        return model
+    if entry["format"] == PROPHET_FORMAT:
+        with gzip.open(path, "rb") as f:
+            return prophet_from_payload(json.load(f))
+    raise ValueError(f"Format de modèle inconnu : {entry['format']}")
+
+
+def convert_models(path_dir="models"):
+    """Écrit le bundle de tous les anciens fichiers (.pkl, .json) d'un dossier."""
+    import joblib
+    from prophet.serialize import model_from_json
+
+    converted = []
+    for path in sorted(glob.glob(os.path.join(path_dir, "model_*.pkl"))):
+        name = os.path.basename(path)[len("model_") : -len(".pkl")]
+        model_name, _, family = name.rpartition("_")
+        model = joblib.load(path)
+        family = _family_label(path_dir, family)
+        save_xgboost_bundle(model, model_name, family, path_dir)
+        converted.append((model_name, family))
+
+    for path in sorted(glob.glob(os.path.join(path_dir, "model_prophet_*.json"))):
+        family = os.path.basename(path)[len("model_prophet_") : -len(".json")]
+        with open(path) as f:
+            model = model_from_json(f.read())
+        family = _family_label(path_dir, family)
+        save_prophet_bundle(model, family, path_dir)
+        converted.append(("prophet", family))
+    return converted
+
+
+def _family_label(path_dir, family):
+    # Les noms de fichiers sont en minuscules : on garde le libellé déjà
+    # présent dans le manifest s'il existe, sinon on capitalise
+    for entry in read_manifest(path_dir)["models"].values():
+        if entry["family"].lower() == family:
+            return entry["family"]
+    return family.capitalize()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion des modèles en bundle")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+    for model_name, family in convert_models(args.models_dir):
+        print(f"✅ {model_name} / {family}")
+    print(f"Manifest : {os.path.join(args.models_dir, MANIFEST)}")
@@ -0,0 +1,138 @@
+"""
+Versions des modèles, publiées de façon atomique.
+
+    models/
+        current                             version publiée (pointeur)
+        versions/
+            20261019T172300123456-k3j9x1/   manifest.json + fichiers des modèles
+            ...
+        leaderboard.csv
+
+Un entraînement écrit ses modèles dans une nouvelle version, invisible des
+lecteurs, puis remplace le pointeur `current` (fichier temporaire +
+os.replace, atomique) : une session qui charge un modèle pendant
+l'entraînement lit l'ancienne version complète, la suivante lit la nouvelle.
+Une nouvelle version reprend les modèles de la version publiée par liens
+physiques (les écritures remplacent les fichiers, elles ne les modifient
+jamais sur place) : un entraînement partiel garde les autres modèles.
+
+Sans pointeur, le dossier est lu tel quel (organisation à plat). C'est le
+format livré dans le dépôt : `current` et `versions/` sont produits par les
+entraînements locaux et ignorés par git. Une fois une version publiée, elle
+prime sur les fichiers à plat, qui restent les modèles de référence du dépôt
+(supprimer `current` pour y revenir) et servent de base à la première
+version (liens physiques).
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from src.model_bundle import MANIFEST, read_manifest
+
+CURRENT = "current"
+VERSIONS = "versions"
+# Versions gardées après publication (les sessions en cours de chargement
+# d'une version remplacée peuvent encore la lire)
+KEEP_VERSIONS = 3
+
+
+def current_version(root="models"):
+    """Nom de la version publiée, ou None (dossier à plat)."""
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_model_dir(root="models"):
+    """Dossier des modèles à lire : version publiée, sinon le dossier lui-même."""
+    version = current_version(root)
+    if version is None:
+        return root
+    return os.path.join(root, VERSIONS, version)
+
+
+def is_version_dir(path_dir):
+    return os.path.basename(os.path.dirname(os.path.abspath(path_dir))) == VERSIONS
+
+
+def list_versions(root="models"):
+    """Versions présentes, de la plus ancienne à la plus récente."""
+    versions_dir = os.path.join(root, VERSIONS)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        name
+        for name in os.listdir(versions_dir)
+        if os.path.isdir(os.path.join(versions_dir, name))
+    )
+
+
+def create_version(root="models", inherit=True):
+    """
+    Crée une version vide (ou reprenant les modèles publiés si `inherit`),
+    non publiée.
+
+    Returns:
+        str: dossier de la version, où écrire les modèles
+    """
+    versions_dir = os.path.join(root, VERSIONS)
+    os.makedirs(versions_dir, exist_ok=True)
+    # Horodatage UTC à la microseconde : l'ordre des noms est celui des créations
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    version_dir = tempfile.mkdtemp(prefix=f"{stamp}-", dir=versions_dir)
+    os.chmod(version_dir, 0o755)
+
+    if inherit:
+        source = resolve_model_dir(root)
+        manifest = read_manifest(source)
+        files = [entry["file"] for entry in manifest["models"].values()]
+        if files:
+            files.append(MANIFEST)
+        for name in files:
+            src = os.path.join(source, name)
+            dst = os.path.join(version_dir, name)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+    return version_dir
+
+
+def publish_version(version_dir, keep=KEEP_VERSIONS):
+    """
+    Publie `version_dir` (créée par `create_version`) : remplace le pointeur
+    `current`, puis supprime les versions les plus anciennes au-delà de `keep`.
+
+    Returns:
+        str: nom de la version publiée
+    """
+    if not os.path.exists(os.path.join(version_dir, MANIFEST)):
+        raise FileNotFoundError(f"Version sans manifest, non publiée : {version_dir}")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(version_dir)))
+    version = os.path.basename(os.path.abspath(version_dir))
+
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(version + "\n")
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, os.path.join(root, CURRENT))
+
+    prune_versions(root, keep)
+    return version
+
+
+def prune_versions(root="models", keep=KEEP_VERSIONS):
+    """
+    Supprime les anciennes versions : garde la version publiée et les `keep`
+    plus récentes (dont une éventuelle version en cours d'écriture).
+    """
+    current = current_version(root)
+    others = [v for v in list_versions(root) if v != current]
+    old = others[: max(len(others) - keep, 0)] if keep > 0 else others
+    for version in old:
+        shutil.rmtree(os.path.join(root, VERSIONS, version), ignore_errors=True)
+    return old
@@ -1,10 +1,26 @@
 import pandas as pd
-from prophet import Prophet
-from prophet.serialize import model_to_json
 import os
 import joblib
-from xgboost import XGBRegressor
 import numpy as np
+from src.calendrier import calendar_features
+from src.instrumentation import set_cache_status, stage
+from src.model_bundle import (
+    bundle_key,
+    load_bundle_model,
+    read_manifest,
+    save_prophet_bundle,
+    save_xgboost_bundle,
+)
+from src.model_versions import (
+    create_version,
+    is_version_dir,
+    publish_version,
+    resolve_model_dir,
+)
+
+# (dossier, modèle, famille) -> (empreinte, modèle chargé) : un modèle n'est
+# relu que si la version publiée en contient un autre
+_loaded_models = {}
 
 
 def load_discount_and_promo_dicts(
@@ -51,66 +67,152 @@ def add_rolling_features(df, col="quantity", windows=[3]):
     return df
 
 
+@stage("prepare_aggregated")
 def prepare_aggregated(
-    df, date_col="date", family_col="family", quantity_col="quantity"
+    df,
+    date_col="date",
+    family_col="family",
+    quantity_col="quantity",
+    workers=None,
+    partition_by="date",
+    engine="pandas",
 ):
-    df = df.copy()
-    df[date_col] = pd.to_datetime(df[date_col])
-
-    # Calcul de la date de début de semaine (toujours un lundi)
-    df["week_start"] = df[date_col] - pd.to_timedelta(df[date_col].dt.weekday, unit="D")
-
-    # On extrait année, semaine et mois depuis cette date pivot
-    df["year"] = df["week_start"].dt.isocalendar().year
-    df["week"] = df["week_start"].dt.isocalendar().week
-    df["month"] = df["week_start"].dt.month
-
-    # Agrégation par semaine/famille
-    weekly_sales = (
-        df.groupby([family_col, "year", "month", "week", "week_start"])
-        .agg(
-            {
-                "price_initial": "mean",
-                "price_sold": "mean",
-                "revenue": "sum",
-                "discount_amount": "sum",
-                quantity_col: "sum",
-            }
+    # Moteur Polars : plan paresseux, sur un DataFrame ou directement un fichier
+    if engine == "polars":
+        from src.polars_engine import prepare_aggregated_polars
+
+        return prepare_aggregated_polars(
+            df, date_col=date_col, family_col=family_col, quantity_col=quantity_col
+        )
+
+    # Un chemin de fichier délègue l'agrégation au backend SQL (DuckDB)
+    if isinstance(df, (str, os.PathLike)):
+        from src.sql_backend import prepare_aggregated_sql
+
+        return prepare_aggregated_sql(
+            df, date_col=date_col, family_col=family_col, quantity_col=quantity_col
+        )
+
+    # Plusieurs processus : partitions agrégées en parallèle puis fusionnées
+    if workers is not None and workers > 1:
+        from src.parallel_aggregate import prepare_aggregated_parallel
+
+        return prepare_aggregated_parallel(
+            df,
+            workers=workers,
+            by=partition_by,
+            date_col=date_col,
+            family_col=family_col,
+            quantity_col=quantity_col,
         )
+
+    return finalize_weekly(weekly_partial(df, date_col, family_col, quantity_col))
+
+
+# Moyennes hebdomadaires, gardées en somme + effectif dans les agrégats partiels
+WEEKLY_MEAN_COLUMNS = ["price_initial", "price_sold"]
+WEEKLY_SUM_COLUMNS = ["revenue", "discount_amount"]
+WEEKLY_KEYS = ["year", "month", "week", "week_start"]
+
+
+def weekly_partial(df, date_col="date", family_col="family", quantity_col="quantity"):
+    """
+    Agrégats hebdomadaires partiels par famille : sommes et effectifs.
+
+    Deux partiels (deux lots de transactions, deux partitions) se fusionnent
+    exactement avec `merge_weekly_partials`, y compris pour les moyennes de
+    prix ; `finalize_weekly` en tire la table de `prepare_aggregated`.
+    """
+    # df n'est pas modifié : les clés de groupement sont des séries à part
+    # Date de début de semaine (toujours un lundi), lue dans la dimension calendaire
+    cal = calendar_features(
+        pd.to_datetime(df[date_col]), ["week_start", "iso_year", "iso_week"]
+    )
+
+    # Année et semaine ISO du lundi = celles de la date ; mois du lundi
+    keys = [
+        df[family_col],
+        cal["iso_year"].astype("UInt32").rename("year"),
+        calendar_features(cal["week_start"], ["month"])["month"],
+        cal["iso_week"].astype("UInt32").rename("week"),
+        cal["week_start"],
+    ]
+
+    # Un seul groupby : sommes des prix, effectifs non nuls, sommes simples
+    means = df[WEEKLY_MEAN_COLUMNS]
+    values = pd.concat(
+        [
+            means.add_suffix("_sum"),
+            means.notna().astype("int64").add_suffix("_count"),
+            df[WEEKLY_SUM_COLUMNS + [quantity_col]],
+        ],
+        axis=1,
+    )
+    return values.groupby(keys).sum().reset_index()
+
+
+def merge_weekly_partials(partials, family_col="family"):
+    """Fusionne des agrégats partiels (mêmes clés -> sommes et effectifs additionnés)."""
+    return (
+        pd.concat(partials, ignore_index=True)
+        .groupby([family_col] + WEEKLY_KEYS)
+        .sum()
         .reset_index()
     )
 
-    # On renomme week_start en date pour la suite (prévisions)
-    weekly_sales = weekly_sales.rename(columns={"week_start": "date"})
 
-    return weekly_sales
+def finalize_weekly(partial):
+    """Table hebdomadaire finale : moyennes = somme / effectif."""
+    weekly = partial.drop(
+        columns=[
+            f"{col}_{part}" for col in WEEKLY_MEAN_COLUMNS for part in ("sum", "count")
+        ]
+    )
+    position = len(weekly.columns) - len(WEEKLY_SUM_COLUMNS) - 1
+    for col in reversed(WEEKLY_MEAN_COLUMNS):
+        # Effectif nul -> NaN, comme la moyenne d'un groupe vide
+        mean = partial[f"{col}_sum"] / partial[f"{col}_count"].where(
+            partial[f"{col}_count"] > 0
+        )
+        weekly.insert(position, col, mean)
+
+    # On renomme week_start en date pour la suite (prévisions)
+    return weekly.rename(columns={"week_start": "date"})
 
 
+@stage("add_temporal_features")
 def add_temporal_features(df, date_col="date"):
-    df = df.copy()
-    df[date_col] = pd.to_datetime(df[date_col])
-    df["month"] = df[date_col].dt.month
-    df["year"] = df[date_col].dt.year
-    df["week"] = df[date_col].dt.isocalendar().week
-    df["week_start"] = df[date_col] - pd.to_timedelta(df[date_col].dt.weekday, unit="D")
-    df["week_start"] = df["week_start"].dt.normalize()
-
-    # Sorting by date
-    df = df.sort_values(by=date_col)
+    # Tri par date : la seule copie de df est le résultat trié
+    dates = pd.to_datetime(df[date_col])
+    order = np.argsort(dates.to_numpy())
+    df = df.iloc[order]
+    df[date_col] = dates.iloc[order]
+    cal = calendar_features(df[date_col], ["month", "year", "iso_week", "week_start"])
+    df["month"] = cal["month"]
+    df["year"] = cal["year"]
+    df["week"] = cal["iso_week"].astype("UInt32")
+    df["week_start"] = cal["week_start"]
     return df
 
 
 ####### Partie modèle NAIF ########
+# Graine de la variation aléatoire : une même prévision donne les mêmes valeurs
+# dans le tableau de bord, le service et le leaderboard
+NAIVE_SEED = 0
+
+
 class NaiveRollingMeanModel:
-    def __init__(self, forecast_df, window=3, variation_factor=0.05):
+    def __init__(self, forecast_df, window=3, variation_factor=0.05, seed=NAIVE_SEED):
         """
         forecast_df : DataFrame contenant au moins ['date', 'family', 'quantity']
         window : Taille de la fenêtre pour la moyenne glissante (par exemple, 3 semaines)
         variation_factor : Facteur de variation ajouté pour rendre les prédictions moins statiques
+        seed : Graine de la variation (None = tirage différent à chaque prévision)
         """
         self.lookup = forecast_df[["date", "quantity"]]
         self.window = window
         self.variation_factor = variation_factor
+        self.seed = seed
 
         # Pour une moyenne glissante sur X semaines, on doit garder les X dernière semaines.
 
@@ -121,6 +223,7 @@ class NaiveRollingMeanModel:
         family : famille de produits à prédire
         """
         predictions = []
+        rng = np.random.default_rng(self.seed)
         # Dernière date du dataset
         last_date = self.lookup["date"].max()
 
@@ -142,7 +245,7 @@ class NaiveRollingMeanModel:
 
             # Variation aléatoire
             variation = (
-                np.random.uniform(-self.variation_factor, self.variation_factor)
+                rng.uniform(-self.variation_factor, self.variation_factor)
                 * mean_quantity
             )
             prediction = mean_quantity + variation
@@ -160,14 +263,15 @@ class NaiveRollingMeanModel:
         return pd.DataFrame(predictions)
 
 
+@stage("predict_with_naive")
 def predict_with_naive(
     df, periods=6, freq="W-MON", date_col="date", quantity_col="quantity"
 ):
     """
     Prédit les quantités avec le modèle Naïf (moyenne mobile sur 3 semaines) et ajout de variation
     """
-    df = df.copy()
-    df = add_temporal_features(df, date_col=date_col)
+    # Seules la date et la quantité servent au modèle naïf
+    df = add_temporal_features(df[[date_col, quantity_col]], date_col=date_col)
 
     # Créer une copie pour la prédiction avec une variation
     model = NaiveRollingMeanModel(df, window=3, variation_factor=0.05)
@@ -181,22 +285,25 @@ def predict_with_naive(
 ######## Partie XGBoost ########
 
 
+@stage("prepare_features")
 def prepare_features(df, family, quantity_col="quantity"):
     df = df.copy()
     df = add_temporal_features(df)
     avg_discount_dict, promotion_type_dict = load_discount_and_promo_dicts()
     df["avg_discount"] = df.apply(
-        lambda row: avg_discount_dict.get(family, {})
-        .get(row["year"], {})
-        .get(row["week"], 0),
+        lambda row: (
+            avg_discount_dict.get(family, {}).get(row["year"], {}).get(row["week"], 0)
+        ),
         axis=1,
     )
 
     # 📢 Type de promotion
     df["promotion_type"] = df.apply(
-        lambda row: promotion_type_dict.get(family, {})
-        .get(row["year"], {})
-        .get(row["week"], "none"),
+        lambda row: (
+            promotion_type_dict.get(family, {})
+            .get(row["year"], {})
+            .get(row["week"], "none")
+        ),
         axis=1,
     )
     # One hot
@@ -210,6 +317,9 @@ def prepare_features(df, family, quantity_col="quantity"):
 
 
 def train_xgboost(X, y):
+    # Import local : xgboost n'est chargé que si l'on entraîne
+    from xgboost import XGBRegressor
+
     # Créer le modèle XGBoost
     model = XGBRegressor(n_estimators=100, learning_rate=0.1, max_depth=6)
 
@@ -219,58 +329,231 @@ def train_xgboost(X, y):
     return model
 
 
-def predict_with_xgboost(model, horizon, X_train, family):
-    last_date = pd.to_datetime(X_train["date"]).max()
+def future_features(horizon, last_date, family):
+    """Dates futures et features XGBoost correspondantes (tout l'horizon)."""
     future_dates = pd.date_range(
         start=last_date + pd.Timedelta(weeks=1), periods=horizon, freq="W-MON"
     )
     avg_discount_dict, promotion_type_dict = load_discount_and_promo_dicts()
-    predictions = []
-
-    for date in future_dates:
-        year = date.year
-        month = date.month
-        week = date.isocalendar().week
-
-        # Récupération dans les dictionnaires
-        avg_discount = avg_discount_dict.get(family, {}).get(year, {}).get(week, 0)
-        promo_type = promotion_type_dict.get(family, {}).get(year, {}).get(week, "none")
-
-        is_promo_online = int(promo_type in ["online", "both"])
-        is_promo_store = int(promo_type in ["store", "both"])
-
-        # Création du vecteur de features
-        X_pred = pd.DataFrame(
-            [
-                {
-                    "month": month,
-                    "year": year,
-                    "week": week,
-                    "avg_discount": avg_discount,
-                    "is_promo_online": is_promo_online,
-                    "is_promo_store": is_promo_store,
-                }
-            ]
-        )
 
-        # Prédiction
-        y_pred = model.predict(X_pred)[0]
-        predictions.append({"date": date, "prediction": y_pred})
-    return pd.DataFrame(predictions)
+    # Attributs calendaires de toutes les dates futures en une seule lecture
+    cal = calendar_features(future_dates, ["month", "year", "iso_week"])
+    X_pred = pd.DataFrame(
+        {"month": cal["month"], "year": cal["year"], "week": cal["iso_week"]}
+    ).astype("int64")
+
+    # Récupération dans les dictionnaires
+    X_pred["avg_discount"] = [
+        avg_discount_dict.get(family, {}).get(year, {}).get(week, 0)
+        for year, week in zip(X_pred["year"], X_pred["week"])
+    ]
+    promo_types = pd.Series(
+        [
+            promotion_type_dict.get(family, {}).get(year, {}).get(week, "none")
+            for year, week in zip(X_pred["year"], X_pred["week"])
+        ]
+    )
+    X_pred["is_promo_online"] = promo_types.isin(["online", "both"]).astype(int)
+    X_pred["is_promo_store"] = promo_types.isin(["store", "both"]).astype(int)
+    return future_dates, X_pred
+
+
+@stage("predict_with_xgboost")
+def predict_with_xgboost(model, horizon, X_train, family):
+    last_date = pd.to_datetime(X_train["date"]).max()
+    future_dates, X_pred = future_features(horizon, last_date, family)
+
+    # Prédiction de tout l'horizon en un seul appel
+    return pd.DataFrame({"date": future_dates, "prediction": model.predict(X_pred)})
+
+
+# Colonne des contributions : valeur de base du modèle (moyenne des arbres)
+CONTRIBUTION_BIAS = "bias"
+
+
+def xgboost_contributions(model, X_pred):
+    """
+    Contributions SHAP (TreeSHAP natif de XGBoost, `pred_contribs`) de chaque
+    feature à chaque prédiction de `X_pred`, en un seul appel au booster.
+
+    Returns:
+        DataFrame: une colonne par feature plus `CONTRIBUTION_BIAS` ; la somme
+        d'une ligne est la prédiction
+    """
+    from xgboost import DMatrix
+
+    contributions = model.get_booster().predict(DMatrix(X_pred), pred_contribs=True)
+    return pd.DataFrame(
+        contributions,
+        columns=[*X_pred.columns, CONTRIBUTION_BIAS],
+        index=X_pred.index,
+    )
+
+
+@stage("explain_xgboost")
+def explain_xgboost(model, horizon, X_train, family):
+    """
+    Contributions des features aux prévisions de `predict_with_xgboost`
+    (mêmes dates, mêmes features futures).
+
+    Returns:
+        DataFrame: ['date', features..., 'bias', 'prediction']
+    """
+    last_date = pd.to_datetime(X_train["date"]).max()
+    future_dates, X_pred = future_features(horizon, last_date, family)
+
+    contributions = xgboost_contributions(model, X_pred)
+    contributions["prediction"] = contributions.sum(axis=1)
+    contributions.insert(0, "date", future_dates)
+    return contributions
+
+
+######## XGBoost multi-quantiles ########
+
+# Quantiles appris par un seul booster (P10 / P50 / P90)
+QUANTILES = [0.1, 0.5, 0.9]
+
+
+def quantile_columns(quantiles=QUANTILES):
+    return [f"p{round(q * 100)}" for q in quantiles]
+
+
+def train_xgboost_quantile(X, y, quantiles=QUANTILES):
+    """Un booster XGBoost qui prédit tous les `quantiles` à la fois."""
+    from xgboost import XGBRegressor
+
+    model = XGBRegressor(
+        objective="reg:quantileerror",
+        quantile_alpha=np.array(quantiles),
+        n_estimators=100,
+        learning_rate=0.1,
+        max_depth=6,
+    )
+    model.fit(X, y)
+    return model
+
+
+@stage("predict_with_xgboost_quantiles")
+def predict_with_xgboost_quantiles(
+    model, horizon, X_train, family, quantiles=QUANTILES
+):
+    """
+    Intervalles de prévision : un seul appel de prédiction pour tout
+    l'horizon et tous les quantiles.
+
+    Returns:
+        DataFrame: colonnes ['date', 'p10', 'p50', 'p90']
+    """
+    last_date = pd.to_datetime(X_train["date"]).max()
+    future_dates, X_pred = future_features(horizon, last_date, family)
+
+    # Quantiles triés par ligne : pas de croisement des bornes
+    predictions = np.sort(
+        np.asarray(model.predict(X_pred)).reshape(len(X_pred), -1), axis=1
+    )
+    bands = pd.DataFrame(predictions, columns=quantile_columns(quantiles))
+    bands.insert(0, "date", future_dates)
+    return bands
+
+
+def _save_versioned(save, path_dir):
+    """
+    Écrit directement dans une version en cours (`create_version`) ; sinon
+    publie une nouvelle version qui ne change que ce modèle.
+    """
+    if is_version_dir(path_dir):
+        save(path_dir)
+        return path_dir
+    version_dir = create_version(path_dir)
+    save(version_dir)
+    publish_version(version_dir)
+    return version_dir
 
 
 def save_model(model, model_name, family, path_dir="models"):
-    # Crée le dossier si il n'existe pas
-    os.makedirs(path_dir, exist_ok=True)
+    """
+    Sauvegarde un modèle XGBoost au format bundle (binaire natif UBJSON,
+    décrit dans le manifest, voir src/model_bundle.py), dans une version
+    publiée atomiquement (voir src/model_versions.py).
+    """
+    version_dir = _save_versioned(
+        lambda d: save_xgboost_bundle(model, model_name, family, d), path_dir
+    )
+
+    print(f"Modèle {model_name} sauvegardé dans {version_dir} (bundle)")
+
+
+def model_path(model_name, family, path_dir="models"):
+    """Chemin de l'ancien format (.pkl joblib)."""
+    return os.path.join(path_dir, f"model_{model_name.lower()}_{family.lower()}.pkl")
+
+
+def _legacy_path(model_name, family, path_dir):
+    if model_name == "prophet":
+        return prophet_path(family, path_dir)
+    return model_path(model_name, family, path_dir)
+
+
+def model_exists(model_name, family, path_dir="models"):
+    """Vrai si le modèle existe en bundle ou dans l'ancien format."""
+    model_dir = resolve_model_dir(path_dir)
+    if bundle_key(model_name, family) in read_manifest(model_dir)["models"]:
+        return True
+    return os.path.exists(_legacy_path(model_name, family, model_dir))
+
+
+def _model_signature(model_name, family, model_dir):
+    entry = read_manifest(model_dir)["models"].get(bundle_key(model_name, family))
+    if entry is not None:
+        return entry.get("sha256") or (entry["file"], entry["bytes"], entry["created"])
+    path = _legacy_path(model_name, family, model_dir)
+    return (os.path.abspath(path), os.stat(path).st_mtime_ns)
 
-    # Définir le chemin du fichier pour sauvegarder
-    filename = f"model_{model_name}_{family.lower()}.pkl"
-    model_path = os.path.join(path_dir, filename)
 
-    # Sauvegarde du modèle
-    joblib.dump(model, model_path)
+def clear_loaded_models():
+    """Vide le cache des modèles chargés (prochain chargement depuis le disque)."""
+    _loaded_models.clear()
 
-    print(f"Modèle {model_name} sauvegardé sous {model_path}")
+
+def model_signature(model_name, family, path_dir="models"):
+    """Empreinte du modèle publié : change quand une nouvelle version le modifie."""
+    return _model_signature(model_name, family, resolve_model_dir(path_dir))
+
+
+def _load_cached(model_name, family, path_dir, load):
+    """
+    Modèle de la version publiée de `path_dir`, gardé en mémoire : après une
+    nouvelle publication, seuls les modèles modifiés sont relus.
+    """
+    model_dir = resolve_model_dir(path_dir)
+    signature = _model_signature(model_name, family, model_dir)
+    key = (os.path.abspath(path_dir), model_name.lower(), family.lower())
+    cached = _loaded_models.get(key)
+    if cached is not None and cached[0] == signature:
+        set_cache_status("hit")
+        return cached[1]
+
+    set_cache_status("miss")
+    model = load(model_dir)
+    _loaded_models[key] = (signature, model)
+    return model
+
+
+@stage("load_saved_model")
+def load_saved_model(model_name, family, path_dir="models"):
+    """
+    Charge un modèle sauvegardé par `save_model` : bundle en priorité, sinon
+    ancien fichier .pkl.
+    Lève FileNotFoundError si aucun des deux n'existe.
+    """
+
+    def load(model_dir):
+        model = load_bundle_model(model_name, family, model_dir)
+        if model is not None:
+            return model
+        return joblib.load(model_path(model_name, family, model_dir))
+
+    return _load_cached(model_name, family, path_dir, load)
 
 
 ####### Partie Prophet ########
@@ -279,6 +562,10 @@ def save_model(model, model_name, family, path_dir="models"):
 def train_prophet_model(df, date_col="date", quantity_col="quantity"):
     df = df.copy()
     df = df.rename(columns={date_col: "ds", quantity_col: "y"})
+
+    # Import local : prophet (et cmdstanpy) est lent à importer
+    from prophet import Prophet
+
     model = Prophet(
         yearly_seasonality=True,
         weekly_seasonality=True,
@@ -293,6 +580,7 @@ def train_prophet_model(df, date_col="date", quantity_col="quantity"):
     return model
 
 
+@stage("predict_with_prophet")
 def predict_with_prophet(model, periods=6, freq="W-MON", return_only_future=True):
     future = model.make_future_dataframe(periods=periods, freq=freq)
     forecast = model.predict(future)
@@ -309,57 +597,120 @@ def predict_with_prophet(model, periods=6, freq="W-MON", return_only_future=True
 
 def save_prophet_model(model, family, path_dir="models"):
     """
-    Sauvegarde un modèle Prophet sous format .json
+    Sauvegarde un modèle Prophet au format bundle (paramètres compressés,
+    sans l'historique d'entraînement), dans une version publiée atomiquement
+    """
+    _save_versioned(lambda d: save_prophet_bundle(model, family, d), path_dir)
+
+
+def prophet_path(family, path_dir="models"):
+    """Chemin de l'ancien format (JSON complet de model_to_json)."""
+    return os.path.join(path_dir, f"model_prophet_{family.lower()}.json")
+
+
+@stage("load_saved_prophet_model")
+def load_saved_prophet_model(family, path_dir="models"):
     """
-    filename = f"model_prophet_{family.lower()}.json"
-    path = os.path.join(path_dir, filename)
-    with open(path, "w") as fout:
-        fout.write(model_to_json(model))
+    Charge un modèle Prophet sauvegardé par `save_prophet_model` : bundle en
+    priorité, sinon ancien fichier .json.
+    """
+
+    def load(model_dir):
+        model = load_bundle_model("prophet", family, model_dir)
+        if model is not None:
+            return model
+
+        from prophet.serialize import model_from_json
+
+        with open(prophet_path(family, model_dir), "r") as fin:
+            return model_from_json(fin.read())
+
+    return _load_cached("prophet", family, path_dir, load)
 
 
 ####### Train all models ########
-def train_all_models(df):
+# Colonnes d'entrée du modèle XGBoost, dans l'ordre d'entraînement
+FEATURE_COLUMNS = [
+    "month",
+    "year",
+    "week",
+    "avg_discount",
+    "is_promo_online",
+    "is_promo_store",
+]
+
+
+def weekly_family_series(df, family):
+    """Quantités hebdomadaires d'une famille : colonnes ['date', 'quantity']."""
+    df_fam = df[df["family"] == family].copy()
+    df_fam["date"] = pd.to_datetime(df_fam["date"])
+    df_fam["week_start"] = calendar_features(df_fam["date"], ["week_start"])[
+        "week_start"
+    ]
+    weekly = df_fam.groupby("week_start").agg({"quantity": "sum"}).reset_index()
+    return weekly.rename(columns={"week_start": "date"})
+
+
+def build_training_features(df, family):
+    """Features XGBoost d'entraînement d'une famille (lignes complètes)."""
+    return prepare_features(weekly_family_series(df, family), family).dropna()
+
+
+@stage("train_all_models")
+def train_all_models(df, path_dir="models", feature_store=None):
     """
     Entraîne et sauvegarde 3 modèles (Naïf, XGBoost, Prophet) pour chaque famille.
+
+    Si `feature_store` (voir src/feature_store.py) est fourni, les features
+    XGBoost y sont lues au lieu d'être recalculées.
+
+    Les modèles sont écrits dans une nouvelle version de `path_dir`, publiée
+    d'un coup à la fin : les lecteurs ne voient jamais un entraînement partiel.
     """
     families = df["family"].unique()
+    version_dir = create_version(path_dir)
 
     for fam in families:
         print(f"🔁 Entraînement des modèles pour la famille : {fam}")
 
         # Filtrage + groupement hebdo
-        df_fam = df[df["family"] == fam].copy()
-        df_fam["date"] = pd.to_datetime(df_fam["date"])
-        df_fam["week_start"] = df_fam["date"] - pd.to_timedelta(
-            df_fam["date"].dt.weekday, unit="D"
-        )
-        weekly = df_fam.groupby("week_start").agg({"quantity": "sum"}).reset_index()
-        weekly = weekly.rename(columns={"week_start": "date"})
+        weekly = weekly_family_series(df, fam)
 
         ##### XGBoost #####
-        xgb_df = prepare_features(weekly.copy(), fam)
+        if feature_store is not None and fam in feature_store.families:
+            xgb_df = feature_store.frame(fam)
+        else:
+            xgb_df = build_training_features(df, fam)
         print(xgb_df)
-        xgb_df = xgb_df.dropna()
 
         # Entraînement de XGBoost
         # Séparer les features et la cible
-        X = xgb_df.drop(columns=["date", "quantity", "week_start"])
+        X = xgb_df[FEATURE_COLUMNS]
         print(X)
         y = xgb_df["quantity"]
         # Entraîner le modèle
         xgb_model = train_xgboost(X, y)
-        save_model(xgb_model, "xgboost", family=fam)
+        save_model(xgb_model, "xgboost", family=fam, path_dir=version_dir)
         print(f"✅ Modèle XGBoost sauvegardé pour : {fam}")
 
+        # Intervalles de prévision (P10 / P50 / P90) sur les mêmes features
+        quantile_model = train_xgboost_quantile(X, y)
+        save_model(quantile_model, "xgboost_quantile", family=fam, path_dir=version_dir)
+
         ##### Prophet #####
         prophet_model = train_prophet_model(weekly.copy())
-        save_prophet_model(prophet_model, family=fam)
+        save_prophet_model(prophet_model, family=fam, path_dir=version_dir)
 
         print(f"✅ Modèles sauvegardés pour : {fam}")
 
+    version = publish_version(version_dir)
+    print(f"✅ Version publiée : {version}")
+
 
 if __name__ == "__main__":
     # Exemple d'utilisation
     df = pd.read_csv("data/processed/clean_transactions.csv")
     df = prepare_aggregated(df)
-    train_all_models(df)
+    from src.feature_store import load_feature_store
+
+    train_all_models(df, feature_store=load_feature_store())
@@ -0,0 +1,134 @@
+"""
+Exécution partitionnée (map-reduce) de `prepare_aggregated`.
+
+- map    : chaque processus agrège une partition des transactions en
+           agrégats partiels (sommes et effectifs, `weekly_partial`) ;
+- reduce : `merge_weekly_partials` puis `finalize_weekly`.
+
+Les partitions sont des plages de semaines entières (by="date") ou des
+groupes de familles (by="family") : chaque groupe (famille, semaine) tombe
+dans une seule partition, avec ses lignes dans l'ordre d'origine. Les sommes
+sont donc calculées dans le même ordre qu'en série et le résultat est
+identique à celui de `prepare_aggregated`.
+
+Le découpage ne lit que les dates distinctes (factorisées) et les familles :
+il ne refait pas le travail des partitions.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.calendrier import calendar_features
+from src.instrumentation import stage
+from src.modeling import (
+    WEEKLY_MEAN_COLUMNS,
+    WEEKLY_SUM_COLUMNS,
+    finalize_weekly,
+    merge_weekly_partials,
+    weekly_partial,
+)
+
+PARTITION_BY = ("date", "family")
+
+
+def _week_partitions(dates, n_partitions):
+    """Numéro de partition de chaque ligne : plages de semaines de tailles proches."""
+    codes, uniques = pd.factorize(dates)
+    week_start = calendar_features(pd.Series(pd.to_datetime(uniques)), ["week_start"])[
+        "week_start"
+    ]
+    week_codes, weeks = pd.factorize(week_start, sort=True)
+
+    # Lignes par semaine (dans l'ordre chronologique) ; chaque semaine, entière,
+    # va à la partition où commence sa plage de lignes
+    rows_per_date = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    rows_per_week = np.bincount(week_codes, weights=rows_per_date, minlength=len(weeks))
+    rows_before = np.cumsum(rows_per_week) - rows_per_week
+    share = rows_before / max(rows_per_week.sum(), 1)
+    week_partition = np.minimum(
+        (share * n_partitions).astype(np.int64), n_partitions - 1
+    )
+
+    # Dates manquantes : ignorées par le groupby, quelle que soit la partition
+    return np.where(codes >= 0, week_partition[week_codes][codes], 0)
+
+
+def _family_partitions(families, n_partitions):
+    """Numéro de partition de chaque ligne : familles réparties par volume."""
+    codes, uniques = pd.factorize(families)
+    rows = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    family_partition = np.empty(len(uniques), dtype=np.int64)
+    load = np.zeros(n_partitions)
+    # Plus grosses familles d'abord, chacune dans la partition la moins chargée
+    for family in np.argsort(-rows, kind="stable"):
+        target = int(np.argmin(load))
+        family_partition[family] = target
+        load[target] += rows[family]
+    return np.where(codes >= 0, family_partition[codes], 0)
+
+
+def partition_rows(df, by="date", n_partitions=4, date_col="date", family_col="family"):
+    """
+    Indices (croissants) des lignes de chaque partition non vide.
+    """
+    if by == "date":
+        labels = _week_partitions(df[date_col], n_partitions)
+    elif by == "family":
+        labels = _family_partitions(df[family_col], n_partitions)
+    else:
+        raise ValueError(
+            f"Partitionnement inconnu : {by} (attendu : {', '.join(PARTITION_BY)})"
+        )
+    rows = [np.flatnonzero(labels == p) for p in range(n_partitions)]
+    return [r for r in rows if len(r)]
+
+
+def _aggregate_partition(args):
+    part, date_col, family_col, quantity_col = args
+    return weekly_partial(part, date_col, family_col, quantity_col)
+
+
+@stage("prepare_aggregated_parallel")
+def prepare_aggregated_parallel(
+    df,
+    workers=None,
+    by="date",
+    n_partitions=None,
+    date_col="date",
+    family_col="family",
+    quantity_col="quantity",
+):
+    """
+    `prepare_aggregated` réparti sur `workers` processus.
+
+    Args:
+        df (DataFrame): transactions nettoyées
+        workers (int): nombre de processus (défaut : nombre de cœurs)
+        by (str): "date" (plages de semaines) ou "family"
+        n_partitions (int): nombre de partitions (défaut : workers)
+    """
+    workers = workers or os.cpu_count() or 1
+    n_partitions = n_partitions or workers
+    columns = (
+        [date_col, family_col]
+        + WEEKLY_MEAN_COLUMNS
+        + WEEKLY_SUM_COLUMNS
+        + [quantity_col]
+    )
+    partitions = partition_rows(df, by, n_partitions, date_col, family_col)
+    values = df[columns]
+    tasks = [
+        (values.take(rows), date_col, family_col, quantity_col)
+        for rows in partitions or [np.arange(len(df))]
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        partials = [_aggregate_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            partials = list(pool.map(_aggregate_partition, tasks))
+
+    return finalize_weekly(merge_weekly_partials(partials, family_col))
@@ -0,0 +1,434 @@
+"""
+Exécution de la chaîne de traitement, étape par étape, sans refaire ce qui
+est à jour.
+
+Chaque étape déclare ses entrées (fichiers de données et code) et ses
+sorties. Les dépendances s'en déduisent : une étape dépend de celle qui
+produit une de ses entrées. Une étape est à jour si l'empreinte (SHA-256 du
+contenu) de ses entrées et de ses paramètres est celle de sa dernière
+exécution et si ses sorties n'ont pas changé depuis. Une étape relancée qui
+produit les mêmes fichiers ne relance donc pas la suite.
+
+Les étapes indépendantes (nettoyage train / test, par exemple) tournent en
+parallèle, chacune dans un processus. L'état est enregistré après chaque
+étape réussie dans data/pipeline_state.json.
+
+    python -m src.pipeline                     # tout ce qui n'est pas à jour
+    python -m src.pipeline train_models        # une cible et ses dépendances
+    python -m src.pipeline --dry-run           # étapes qui seraient lancées
+    python -m src.pipeline --force clean_train
+    python -m src.pipeline generate            # régénère les données brutes
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from src.aggregate_cache import file_fingerprint
+
+STATE_PATH = "data/pipeline_state.json"
+STATE_VERSION = 1
+
+RAW_TRAIN = "data/raw/transactions.csv"
+RAW_TEST = "data/raw/transactions_test.csv"
+CLEAN_TRAIN = "data/processed/clean_transactions.csv"
+CLEAN_TEST = "data/processed/clean_transactions_test.csv"
+DISCOUNTS = "data/avg_discount.csv"
+PROMOTIONS = "data/promotion_type.csv"
+PROFILE = "generator/profiles/default.json"
+MODELS_DIR = "models"
+
+
+class Stage:
+    """
+    Étape de la chaîne.
+
+    Args:
+        name (str): nom de l'étape
+        run (callable): fonction de niveau module (exécutée dans un processus),
+            appelée avec `params`
+        inputs (list): fichiers ou dossiers lus (données et code)
+        outputs (list): fichiers écrits
+        params (dict): paramètres, pris en compte dans l'empreinte
+        explicit (bool): lancée seulement si demandée (cible ou --force) ;
+            sinon ses sorties sont des données sources
+    """
+
+    def __init__(self, name, run, inputs, outputs, params=None, explicit=False):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = params or {}
+        self.explicit = explicit
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+
+# Fonctions des étapes (importées dans le processus qui les exécute)
+
+
+def run_generate(profile, output_dir):
+    from generator.data_generator import main
+
+    main(profile, output_dir)
+
+
+def run_cleaning(input_path, output_path, engine):
+    from src.data_cleaning import run_data_cleaning
+
+    run_data_cleaning(input_path, output_path, engine=engine)
+
+
+def run_feature_store(path):
+    from src.feature_store import load_feature_store
+
+    load_feature_store(path)
+
+
+def run_training(path, models_dir):
+    import pandas as pd
+
+    from src.feature_store import load_feature_store
+    from src.modeling import prepare_aggregated, train_all_models
+
+    df = prepare_aggregated(pd.read_csv(path))
+    train_all_models(df, path_dir=models_dir, feature_store=load_feature_store(path))
+
+
+def run_leaderboard(train_path, test_path, output_path):
+    from src.aggregate_cache import cached_prepare_aggregated
+    from src.evaluation import build_leaderboard, build_predictions, save_leaderboard
+
+    df_train = cached_prepare_aggregated(train_path)
+    df_test = cached_prepare_aggregated(test_path)
+    save_leaderboard(
+        build_leaderboard(build_predictions(df_train, df_test)), output_path
+    )
+
+
+def default_stages(engine="pandas"):
+    """Chaîne du projet : génération, nettoyage, features, modèles, leaderboard."""
+    return [
+        Stage(
+            "generate",
+            run_generate,
+            inputs=["generator/data_generator.py", PROFILE],
+            outputs=[RAW_TRAIN, RAW_TEST, DISCOUNTS, PROMOTIONS],
+            params={"profile": PROFILE, "output_dir": "data"},
+            # Identifiants de transaction aléatoires : régénérer remplace les
+            # données versionnées et relance toute la chaîne
+            explicit=True,
+        ),
+        Stage(
+            "clean_train",
+            run_cleaning,
+            inputs=[RAW_TRAIN, "src/data_cleaning.py"],
+            outputs=[CLEAN_TRAIN],
+            params={
+                "input_path": RAW_TRAIN,
+                "output_path": CLEAN_TRAIN,
+                "engine": engine,
+            },
+        ),
+        Stage(
+            "clean_test",
+            run_cleaning,
+            inputs=[RAW_TEST, "src/data_cleaning.py"],
+            outputs=[CLEAN_TEST],
+            params={
+                "input_path": RAW_TEST,
+                "output_path": CLEAN_TEST,
+                "engine": engine,
+            },
+        ),
+        Stage(
+            "feature_store",
+            run_feature_store,
+            inputs=[
+                CLEAN_TRAIN,
+                DISCOUNTS,
+                PROMOTIONS,
+                "src/feature_store.py",
+                "src/modeling.py",
+            ],
+            outputs=["data/features/index.json"],
+            params={"path": CLEAN_TRAIN},
+        ),
+        Stage(
+            "train_models",
+            run_training,
+            inputs=[
+                CLEAN_TRAIN,
+                "data/features/index.json",
+                "src/modeling.py",
+                "src/model_bundle.py",
+                "src/model_versions.py",
+            ],
+            # Pointeur de la version publiée (src/model_versions.py)
+            outputs=[os.path.join(MODELS_DIR, "current")],
+            params={"path": CLEAN_TRAIN, "models_dir": MODELS_DIR},
+        ),
+        Stage(
+            "leaderboard",
+            run_leaderboard,
+            inputs=[
+                CLEAN_TRAIN,
+                CLEAN_TEST,
+                os.path.join(MODELS_DIR, "current"),
+                "src/evaluation.py",
+            ],
+            outputs=[os.path.join(MODELS_DIR, "leaderboard.csv")],
+            params={
+                "train_path": CLEAN_TRAIN,
+                "test_path": CLEAN_TEST,
+                "output_path": os.path.join(MODELS_DIR, "leaderboard.csv"),
+            },
+        ),
+    ]
+
+
+def path_fingerprint(path):
+    """Empreinte du contenu d'un fichier, ou de tous les fichiers d'un dossier."""
+    if not os.path.isdir(path):
+        return file_fingerprint(path)
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode())
+            digest.update(file_fingerprint(file_path).encode())
+    return digest.hexdigest()
+
+
+def input_fingerprint(stage):
+    missing = [path for path in stage.inputs if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(
+            f"Étape {stage.name} : entrée(s) introuvable(s) : {', '.join(missing)}"
+        )
+    payload = {
+        "params": stage.params,
+        "inputs": {path: path_fingerprint(path) for path in stage.inputs},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def output_fingerprints(stage):
+    """Empreinte de chaque sortie (None si absente)."""
+    return {
+        path: path_fingerprint(path) if os.path.exists(path) else None
+        for path in stage.outputs
+    }
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {"version": STATE_VERSION, "stages": {}}
+    with open(path) as f:
+        state = json.load(f)
+    if state.get("version") != STATE_VERSION:
+        return {"version": STATE_VERSION, "stages": {}}
+    return state
+
+
+def save_state(state, path=STATE_PATH):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(stage, state):
+    record = state["stages"].get(stage.name)
+    if record is None:
+        return False
+    outputs = output_fingerprints(stage)
+    return (
+        record["inputs"] == input_fingerprint(stage)
+        and None not in outputs.values()
+        and record["outputs"] == outputs
+    )
+
+
+def dependencies(stages):
+    """{étape: noms des étapes qui produisent ses entrées}"""
+    producers = {path: stage.name for stage in stages for path in stage.outputs}
+    return {
+        stage.name: {producers[p] for p in stage.inputs if p in producers}
+        - {stage.name}
+        for stage in stages
+    }
+
+
+def select(stages, targets=(), requested=()):
+    """
+    Étapes nécessaires aux cibles `targets` (toutes si vide), dans l'ordre
+    déclaré. Une étape `explicit` n'est retenue que si elle est une cible ou
+    figure dans `requested`.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    requested = set(targets or ()) | set(requested)
+    unknown = requested - set(by_name)
+    if unknown:
+        raise ValueError(
+            f"Étape(s) inconnue(s) : {', '.join(sorted(unknown))} "
+            f"(disponibles : {', '.join(by_name)})"
+        )
+    deps = dependencies(stages)
+    needed, todo = set(), list(targets or by_name)
+    while todo:
+        name = todo.pop()
+        if name in needed or (by_name[name].explicit and name not in requested):
+            continue
+        needed.add(name)
+        todo.extend(deps[name])
+    return [stage for stage in stages if stage.name in needed]
+
+
+def _run_stage(stage):
+    start = time.perf_counter()
+    stage.run(**stage.params)
+    return time.perf_counter() - start
+
+
+def run_pipeline(
+    stages=None,
+    targets=None,
+    force=(),
+    workers=None,
+    dry_run=False,
+    state_path=STATE_PATH,
+):
+    """
+    Lance les étapes qui ne sont pas à jour, en parallèle dès que leurs
+    dépendances sont terminées.
+
+    Args:
+        stages (list): étapes (défaut : `default_stages()`)
+        targets (list): étapes à produire, avec leurs dépendances (défaut : toutes)
+        force (iterable): étapes relancées même si à jour (une étape
+            `explicit` nommée ici est ajoutée à la sélection)
+        workers (int): processus simultanés (défaut : nombre de cœurs)
+        dry_run (bool): n'exécute rien ; les étapes à lancer ont le statut "à lancer"
+
+    Returns:
+        list[dict]: par étape, {"stage", "status", "seconds"} ; status parmi
+        "lancée", "à jour", "à lancer", "échec", "bloquée"
+    """
+    stages = select(stages or default_stages(), targets, force)
+    deps = dependencies(stages)
+    workers = workers or os.cpu_count() or 1
+    force = set(force)
+    state = load_state(state_path)
+    report = {
+        stage.name: {"stage": stage.name, "status": None, "seconds": 0.0}
+        for stage in stages
+    }
+    pending = {stage.name: stage for stage in stages}
+    finished = set()
+
+    def ready():
+        for name, stage in list(pending.items()):
+            blocked = {
+                d for d in deps[name] if report[d]["status"] in ("échec", "bloquée")
+            }
+            if blocked:
+                report[name]["status"] = "bloquée"
+                del pending[name]
+            elif deps[name] <= finished:
+                del pending[name]
+                yield stage
+
+    def run_or_skip(stage):
+        """True si l'étape doit être exécutée (sinon marquée à jour)."""
+        if stage.name not in force and is_up_to_date(stage, state):
+            report[stage.name]["status"] = "à jour"
+            finished.add(stage.name)
+            return False
+        if dry_run:
+            # Sorties supposées modifiées : la suite serait relancée aussi
+            report[stage.name]["status"] = "à lancer"
+            force.update(n for n, d in deps.items() if stage.name in d)
+            finished.add(stage.name)
+            return False
+        return True
+
+    def record(stage, seconds):
+        state["stages"][stage.name] = {
+            "inputs": input_fingerprint(stage),
+            "outputs": output_fingerprints(stage),
+            "seconds": round(seconds, 3),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        save_state(state, state_path)
+        report[stage.name].update(status="lancée", seconds=seconds)
+        finished.add(stage.name)
+
+    if workers == 1:
+        while pending:
+            for stage in list(ready()):
+                if run_or_skip(stage):
+                    try:
+                        record(stage, _run_stage(stage))
+                    except Exception as exc:
+                        report[stage.name].update(status="échec", error=repr(exc))
+        return list(report.values())
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            for stage in list(ready()):
+                if run_or_skip(stage):
+                    running[pool.submit(_run_stage, stage)] = stage
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    record(stage, future.result())
+                except Exception as exc:
+                    report[stage.name].update(status="échec", error=repr(exc))
+    return list(report.values())
+
+
+def format_report(report):
+    lines = [f"{'Étape':<16}{'Statut':<10}{'Durée (s)':>10}"]
+    for row in report:
+        seconds = f"{row['seconds']:.2f}" if row["status"] == "lancée" else "-"
+        lines.append(f"{row['stage']:<16}{row['status'] or '-':<10}{seconds:>10}")
+        if "error" in row:
+            lines.append(f"    {row['error']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chaîne de traitement incrémentale")
+    parser.add_argument(
+        "targets", nargs="*", help="étapes à produire (défaut : toutes)"
+    )
+    parser.add_argument("--force", nargs="+", default=[], help="étapes à relancer")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--engine", choices=["pandas", "polars"], default="pandas")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    report = run_pipeline(
+        default_stages(engine=args.engine),
+        targets=args.targets,
+        force=args.force,
+        workers=args.workers,
+        dry_run=args.dry_run,
+    )
+    print(format_report(report))
+    if any(row["status"] in ("échec", "bloquée") for row in report):
+        raise SystemExit(1)
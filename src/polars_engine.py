@@ -0,0 +1,153 @@
+"""
+Moteur Polars (optionnel) pour le nettoyage et l'agrégation hebdomadaire.
+
+`clean_dataset` puis `prepare_aggregated` s'expriment ici comme un seul plan
+de requête paresseux (LazyFrame) : lecture du CSV, suppression des lignes
+incomplètes, filtre des valeurs aberrantes (z-score), clés de semaine et
+group-by. Rien n'est matérialisé avant `collect()`, que Polars optimise
+(pushdown des prédicats et des projections, élimination des colonnes
+inutiles) et exécute sur tous les cœurs.
+
+Mêmes règles que la version pandas :
+- ligne supprimée si une de ses colonnes est vide (`dropna()`) ;
+- |z| <= threshold, moyenne et écart-type (ddof=1) calculés après dropna ;
+- semaine = lundi (week_start), année et semaine ISO, mois du lundi.
+
+Sélection : `engine="polars"` dans `run_data_cleaning` / `prepare_aggregated`,
+ou `python -m src.data_cleaning --engine polars`.
+Validation contre pandas : `python -m src.polars_engine`.
+"""
+
+import os
+import time
+
+import pandas as pd
+
+
+def _polars():
+    try:
+        import polars as pl
+    except ImportError as exc:
+        raise ImportError(
+            "Le moteur Polars nécessite le paquet 'polars' (pip install polars)."
+        ) from exc
+    return pl
+
+
+def scan_transactions(source):
+    """LazyFrame des transactions : fichier CSV/Parquet (scan) ou DataFrame pandas."""
+    pl = _polars()
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(".parquet"):
+            return pl.scan_parquet(path)
+        return pl.scan_csv(path)
+    return pl.from_pandas(source).lazy()
+
+
+def clean_plan(lf, col="quantity", threshold=30):
+    """Plan de `clean_dataset` : dropna puis filtre des valeurs aberrantes."""
+    pl = _polars()
+    # NaN flottants (source pandas) traités comme des valeurs manquantes
+    lf = lf.fill_nan(None).drop_nulls()
+    z_scores = (pl.col(col) - pl.col(col).mean()) / pl.col(col).std()
+    return lf.filter(z_scores.abs() <= threshold)
+
+
+def weekly_plan(lf, date_col="date", family_col="family", quantity_col="quantity"):
+    """Plan de `prepare_aggregated` : agrégation hebdomadaire par famille."""
+    pl = _polars()
+    date = pl.col(date_col)
+    if lf.collect_schema()[date_col] == pl.String:
+        date = date.str.to_date("%Y-%m-%d")
+    week_start = date.cast(pl.Date).dt.truncate("1w")
+
+    keys = [
+        pl.col(family_col),
+        week_start.dt.iso_year().cast(pl.UInt32).alias("year"),
+        week_start.dt.month().cast(pl.Int32).alias("month"),
+        week_start.dt.week().cast(pl.UInt32).alias("week"),
+        week_start.cast(pl.Datetime("ns")).alias("date"),
+    ]
+    return (
+        lf.filter(date.is_not_null() & pl.col(family_col).is_not_null())
+        .group_by(keys)
+        .agg(
+            pl.col("price_initial").mean(),
+            pl.col("price_sold").mean(),
+            pl.col("revenue").sum(),
+            pl.col("discount_amount").sum(),
+            pl.col(quantity_col).sum().cast(pl.Int64),
+        )
+        .sort([family_col, "year", "month", "week", "date"])
+    )
+
+
+def _weekly_to_pandas(weekly):
+    # Mêmes types que la version pandas (isocalendar -> UInt32)
+    weekly = weekly.to_pandas()
+    return weekly.astype({"year": "UInt32", "week": "UInt32"})
+
+
+def clean_dataset_polars(source, col="quantity", threshold=30):
+    """Équivalent Polars de `clean_dataset` (DataFrame pandas en sortie)."""
+    return clean_plan(scan_transactions(source), col, threshold).collect().to_pandas()
+
+
+def prepare_aggregated_polars(
+    source, date_col="date", family_col="family", quantity_col="quantity"
+):
+    """Équivalent Polars de `prepare_aggregated` sur des transactions nettoyées."""
+    lf = weekly_plan(scan_transactions(source), date_col, family_col, quantity_col)
+    return _weekly_to_pandas(lf.collect())
+
+
+def clean_and_aggregate(source, threshold=30):
+    """
+    Nettoyage + agrégation hebdomadaire des transactions brutes `source`, en
+    un seul plan paresseux.
+
+    Returns:
+        DataFrame: table de `prepare_aggregated(clean_dataset(raw))`
+    """
+    lf = weekly_plan(clean_plan(scan_transactions(source), threshold=threshold))
+    return _weekly_to_pandas(lf.collect())
+
+
+def validate(raw_path="data/raw/transactions.csv"):
+    """
+    Compare les deux moteurs sur `raw_path` : mêmes lignes nettoyées et même
+    table hebdomadaire. Les flottants sont comparés à tolérance près : le
+    lecteur CSV par défaut de pandas arrondit parfois au flottant voisin
+    (49.81 -> 49.809999999999995), et l'ordre des sommes diffère.
+
+    Returns:
+        dict: durées (s) des deux chaînes
+    """
+    from src.data_cleaning import clean_dataset
+    from src.modeling import prepare_aggregated
+
+    start = time.perf_counter()
+    clean_pd = clean_dataset(pd.read_csv(raw_path))
+    weekly_pd = prepare_aggregated(clean_pd)
+    pandas_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    weekly_pl = clean_and_aggregate(raw_path)
+    polars_s = time.perf_counter() - start
+
+    clean_pl = clean_dataset_polars(raw_path)
+    pd.testing.assert_frame_equal(
+        clean_pl, clean_pd.reset_index(drop=True), check_dtype=False, rtol=1e-12
+    )
+    pd.testing.assert_frame_equal(weekly_pl, weekly_pd, check_exact=False, rtol=1e-9)
+    return {"pandas": pandas_s, "polars": polars_s}
+
+
+if __name__ == "__main__":
+    for path in ("data/raw/transactions.csv", "data/raw/transactions_test.csv"):
+        timings = validate(path)
+        print(
+            f"✅ {path} : mêmes lignes nettoyées et même table hebdomadaire "
+            f"(pandas {timings['pandas']:.3f} s, polars {timings['polars']:.3f} s)"
+        )
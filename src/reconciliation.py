@@ -0,0 +1,277 @@
+"""
+Réconciliation hiérarchique des prévisions (produit -> famille -> total).
+
+Les prévisions de chaque niveau sont produites indépendamment et ne se
+somment pas. La hiérarchie est décrite par la matrice de sommation creuse S
+(séries x produits) : y = S @ y_produits. Toutes les séries sont ordonnées
+[total, familles..., produits...].
+
+Méthodes :
+- "bottom_up"   : prévisions produits agrégées par S ;
+- "top_down"    : total réparti selon les proportions historiques ;
+- "mint_shrink" : MinT avec covariance des résidus rétrécie vers sa
+  diagonale (Schäfer-Strimmer).
+
+Pour MinT, W = lambda * D + (1 - lambda) * E'E / T n'est jamais formée : c'est
+une diagonale plus un terme de rang T (résidus E, T x n). La réconciliation
+utilise la forme projection
+    y~ = y^ - W U' (U W U')^-1 U y^,   U = [I | -C] (contraintes d'agrégation)
+où U est creuse et U W U' n'a que la taille du nombre de séries agrégées.
+Le coût est linéaire en nombre de produits.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.instrumentation import stage
+
+METHODS = ("bottom_up", "top_down", "mint_shrink")
+
+
+class Hierarchy:
+    """Hiérarchie total -> familles -> produits et sa matrice de sommation."""
+
+    def __init__(self, products, families):
+        """
+        Args:
+            products (array-like): identifiant de chaque produit (séries du bas)
+            families (array-like): famille de chaque produit (même longueur)
+        """
+        family_codes, family_labels = pd.factorize(pd.Series(families), sort=True)
+        self.products = list(products)
+        self.families = list(family_labels)
+        self.n_bottom = len(self.products)
+        self.n_aggregates = 1 + len(self.families)
+        self.series = ["Total", *self.families, *self.products]
+
+        # C : agrégats x produits (ligne du total, puis une ligne par famille)
+        cols = np.arange(self.n_bottom)
+        self.C = sp.vstack(
+            [
+                sp.csr_matrix(np.ones((1, self.n_bottom))),
+                sp.csr_matrix(
+                    (np.ones(self.n_bottom), (family_codes, cols)),
+                    shape=(len(self.families), self.n_bottom),
+                ),
+            ]
+        ).tocsr()
+        self.S = sp.vstack([self.C, sp.identity(self.n_bottom, format="csr")]).tocsr()
+
+        # Contraintes U y = 0 : chaque agrégat égale la somme de ses produits
+        self.U = sp.hstack(
+            [sp.identity(self.n_aggregates, format="csr"), -self.C]
+        ).tocsr()
+
+    @classmethod
+    def from_frame(cls, df, product_col="product_id", family_col="family"):
+        products = df[[product_col, family_col]].drop_duplicates(product_col)
+        products = products.sort_values([family_col, product_col])
+        return cls(products[product_col], products[family_col])
+
+    @staticmethod
+    def weeks(df, date_col="date"):
+        """Semaine (lundi -> dimanche) de chaque transaction."""
+        return pd.to_datetime(df[date_col]).dt.to_period("W-SUN")
+
+    def history(
+        self, df, date_col="date", quantity_col="quantity", product_col="product_id"
+    ):
+        """
+        Quantités hebdomadaires de toutes les séries (séries x semaines, dans
+        l'ordre chronologique), agrégats calculés par S.
+        """
+        week = self.weeks(df, date_col)
+        bottom = (
+            df[quantity_col]
+            .groupby([df[product_col], week])
+            .sum()
+            .unstack(fill_value=0)
+            .reindex(self.products, fill_value=0)
+        )
+        return self.S @ bottom.to_numpy(dtype=float)
+
+
+def bottom_up(hierarchy, y_hat):
+    """Prévisions de toutes les séries à partir des seules prévisions produits."""
+    return hierarchy.S @ y_hat[hierarchy.n_aggregates :]
+
+
+def top_down(hierarchy, y_hat, history):
+    """
+    Répartition de la prévision totale selon les proportions historiques
+    (part de chaque produit dans le total sur l'historique).
+    """
+    totals = history[hierarchy.n_aggregates :].sum(axis=1)
+    proportions = totals / totals.sum()
+    return hierarchy.S @ np.outer(proportions, y_hat[0])
+
+
+def shrinkage_intensity(residuals):
+    """
+    Intensité de rétrécissement de Schäfer-Strimmer vers la diagonale.
+
+    Calculée sans former la matrice n x n des corrélations : les sommes sur
+    les paires de séries s'obtiennent à partir de la matrice de Gram T x T.
+
+    Args:
+        residuals (ndarray): résidus, T x n (une colonne par série)
+    """
+    x = np.asarray(residuals, dtype=float)
+    T = x.shape[0]
+    scale = np.sqrt((x**2).sum(axis=0) / T)
+    scale[scale == 0] = 1.0
+    xs = x / scale
+
+    gram = xs @ xs.T  # T x T
+    xs2 = xs**2
+    # sum_ij (xs2' xs2)_ij  et  sum_ij ((xs' xs)_ij)^2 = ||xs xs'||_F^2
+    sum_w2 = (xs2.sum(axis=1) ** 2).sum()
+    sum_w_sq = (gram**2).sum()
+    diag_w2 = (xs2**2).sum(axis=0)
+    diag_w_sq = xs2.sum(axis=0) ** 2
+
+    # Variance des corrélations empiriques, hors diagonale
+    var_r = (sum_w2 - diag_w2.sum() - (sum_w_sq - diag_w_sq.sum()) / T) / (T * (T - 1))
+    # Somme des corrélations au carré, hors diagonale
+    sum_r2 = (sum_w_sq - diag_w_sq.sum()) / T**2
+    if sum_r2 <= 0:
+        return 1.0
+    return float(np.clip(var_r / sum_r2, 0.0, 1.0))
+
+
+def mint_shrink(hierarchy, y_hat, residuals, shrinkage=None):
+    """
+    Réconciliation MinT avec covariance rétrécie.
+
+    Args:
+        hierarchy (Hierarchy): hiérarchie des séries
+        y_hat (ndarray): prévisions de base, séries x horizon
+        residuals (ndarray): résidus in-sample des modèles, T x séries
+        shrinkage (float): intensité imposée (sinon Schäfer-Strimmer)
+    """
+    E = np.asarray(residuals, dtype=float)
+    T = E.shape[0]
+    lam = shrinkage_intensity(E) if shrinkage is None else shrinkage
+    d = (E**2).sum(axis=0) / T
+    low_rank = (1 - lam) / T
+
+    def apply_w(V):
+        # W @ V = lambda * D V + (1 - lambda)/T * E'(E V)
+        return lam * d[:, None] * V + low_rank * (E.T @ (E @ V))
+
+    U = hierarchy.U
+    Ut = U.T.tocsc()
+    EUt = (U @ E.T).T  # T x agrégats
+    M = lam * (U @ sp.diags(d) @ Ut).toarray() + low_rank * (EUt.T @ EUt)
+    Z = np.linalg.solve(M, U @ y_hat)
+    return y_hat - apply_w(Ut @ Z)
+
+
+def rolling_mean_base(history, horizon=12, window=3):
+    """
+    Prévisions de base de toutes les séries (moyenne des `window` dernières
+    semaines, comme le modèle naïf sans variation) et résidus in-sample.
+
+    Returns:
+        Tuple[ndarray, ndarray]: prévisions séries x horizon, résidus T x séries
+    """
+    history = np.asarray(history, dtype=float)
+    cumsum = np.cumsum(history, axis=1)
+    cumsum = np.hstack([np.zeros((len(history), 1)), cumsum])
+    means = (cumsum[:, window:] - cumsum[:, :-window]) / window
+    residuals = history[:, window:] - means[:, :-1]
+    y_hat = np.repeat(means[:, -1:], horizon, axis=1)
+    return y_hat, residuals.T
+
+
+def xgboost_residuals(model, weekly, family):
+    """
+    Résidus in-sample du modèle XGBoost d'une famille (réel - ajusté), sur
+    les features d'entraînement.
+
+    Returns:
+        Series: résidus indexés par début de semaine (lundi)
+    """
+    from src.modeling import FEATURE_COLUMNS, build_training_features
+
+    features = build_training_features(weekly, family)
+    fitted = model.predict(features[FEATURE_COLUMNS])
+    return pd.Series(
+        features["quantity"].to_numpy(dtype=float) - fitted,
+        index=pd.DatetimeIndex(features["date"]),
+    )
+
+
+@stage("reconcile")
+def reconcile(hierarchy, y_hat, method="mint_shrink", history=None, residuals=None):
+    """
+    Prévisions cohérentes de toutes les séries de la hiérarchie.
+
+    Args:
+        hierarchy (Hierarchy): hiérarchie des séries
+        y_hat (ndarray): prévisions de base, séries x horizon, dans l'ordre
+            de `hierarchy.series`
+        method (str): "bottom_up", "top_down" ou "mint_shrink"
+        history (ndarray): historique séries x semaines (top_down)
+        residuals (ndarray): résidus T x séries (mint_shrink)
+    """
+    y_hat = np.asarray(y_hat, dtype=float)
+    if y_hat.ndim == 1:
+        y_hat = y_hat[:, None]
+    if method == "bottom_up":
+        return bottom_up(hierarchy, y_hat)
+    if method == "top_down":
+        return top_down(hierarchy, y_hat, history)
+    if method == "mint_shrink":
+        return mint_shrink(hierarchy, y_hat, residuals)
+    raise ValueError(f"Méthode inconnue : {method} (attendu : {', '.join(METHODS)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Réconciliation hiérarchique")
+    parser.add_argument("--path", default="data/processed/clean_transactions.csv")
+    parser.add_argument("--method", choices=METHODS, default="mint_shrink")
+    parser.add_argument("--horizon", type=int, default=12)
+    args = parser.parse_args()
+
+    from src.aggregate_cache import cached_prepare_aggregated
+    from src.modeling import load_saved_model, predict_with_xgboost
+
+    window = 3
+    df = pd.read_csv(args.path)
+    hierarchy = Hierarchy.from_frame(df)
+    history = hierarchy.history(df)
+    y_hat, residuals = rolling_mean_base(history, args.horizon, window)
+    # Résidus de la moyenne glissante : semaines window.. de l'historique
+    week_starts = pd.PeriodIndex(Hierarchy.weeks(df).unique()).sort_values().start_time
+    residuals = pd.DataFrame(residuals, index=week_starts[window:])
+
+    # Familles : prévisions des modèles XGBoost entraînés (non cohérentes),
+    # avec les résidus in-sample du même modèle pour la covariance de MinT
+    weekly = cached_prepare_aggregated(args.path)
+    for i, family in enumerate(hierarchy.families, start=1):
+        model = load_saved_model("xgboost", family)
+        y_hat[i] = predict_with_xgboost(
+            model, args.horizon, weekly[weekly["family"] == family], family
+        )["prediction"]
+        residuals[i] = xgboost_residuals(model, weekly, family).reindex(residuals.index)
+    # Semaines où toutes les séries ont un résidu
+    residuals = residuals.dropna().to_numpy()
+    reconciled = reconcile(
+        hierarchy, y_hat, args.method, history=history, residuals=residuals
+    )
+
+    levels = slice(0, hierarchy.n_aggregates)
+    summary = pd.DataFrame(
+        {
+            "base": y_hat[levels, 0],
+            "somme_produits": hierarchy.C @ y_hat[hierarchy.n_aggregates :, 0],
+            "reconcilie": reconciled[levels, 0],
+        },
+        index=hierarchy.series[levels],
+    )
+    print(f"Semaine 1, méthode {args.method} :")
+    print(summary.round(1))
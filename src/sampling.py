@@ -0,0 +1,321 @@
+"""
+Analyses approchées sur échantillon, affinées jusqu'au résultat exact.
+
+Ventes (`compute_seasonality`, `compute_family_distribution`) :
+échantillon aléatoire simple sans remise dans chaque strate famille x
+semaine. Les totaux sont estimés par strate (N_h / n_h fois la somme de
+l'échantillon) ; la variance est celle de l'estimateur stratifié d'un
+total de domaine (mois, produit) :
+    V = sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h
+et l'erreur rapportée est la demi-largeur de l'intervalle à 95 %.
+
+Co-achats (`build_graph_cooccurrence`) : échantillon de paniers entiers
+(tirage de Bernoulli de probabilité f par panier). Le poids d'une arête est
+estimé par c / f, d'erreur 1.96 * sqrt(c (1 - f)) / f.
+
+Les tirages reposent sur un nombre aléatoire fixe par ligne (ou par panier) :
+l'échantillon d'une fraction est inclus dans celui d'une fraction plus
+grande. `ProgressiveResult` calcule le premier niveau tout de suite, puis
+les suivants et le résultat exact dans un thread d'arrière-plan.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import compute_family_distribution, compute_seasonality
+from src.instrumentation import stage
+
+# Fractions échantillonnées avant le calcul exact
+FRACTIONS = (0.02, 0.1)
+# Effectif minimal par strate (l'écart-type d'une strate tirée à 2 lignes est
+# trop instable pour un intervalle fiable)
+MIN_PER_STRATUM = 5
+Z_95 = 1.96
+SEED = 42
+
+
+def _day_codes(dates):
+    """Codes des dates distinctes et dates distinctes converties (une seule fois)."""
+    codes, uniques = pd.factorize(dates)
+    return codes, pd.to_datetime(uniques)
+
+
+class StratifiedSampler:
+    """
+    Échantillons stratifiés famille x semaine d'une table de transactions.
+
+    Les strates et l'ordre aléatoire des lignes sont calculés une fois ;
+    chaque échantillon n'est ensuite qu'un masque.
+    """
+
+    def __init__(self, df, min_per_stratum=MIN_PER_STRATUM, seed=SEED):
+        self.df = df
+        self.min_per_stratum = min_per_stratum
+        day_codes, days = _day_codes(df["date"])
+        self.day_codes = day_codes
+        self.days = days
+        # Semaine (lundi) de chaque date distincte, puis strate = famille x semaine
+        week = (days - pd.to_timedelta(days.weekday, unit="D")).to_numpy()
+        week_codes, _ = pd.factorize(week)
+        self.family_codes, self.families = pd.factorize(df["family"])
+        # Famille manquante (code -1) : ligne hors strates, jamais tirée, comme
+        # le groupby exact qui l'ignore. Date manquante : strate « sans semaine »
+        # de la famille (comptée dans la répartition, pas dans la saisonnalité)
+        valid = self.family_codes >= 0
+        n_weeks = week_codes.max(initial=-1) + 1
+        row_weeks = np.where(
+            day_codes >= 0, week_codes[np.maximum(day_codes, 0)], n_weeks
+        )
+        strata = self.family_codes.astype(np.int64) * (n_weeks + 1) + row_weeks
+        self.strata = np.full(len(df), -1, dtype=np.int64)
+        self.strata[valid] = pd.factorize(strata[valid])[0]
+        self.sizes = np.bincount(self.strata[valid])
+
+        # Rang aléatoire de chaque ligne dans sa strate (rang maximal hors strates)
+        u = np.random.default_rng(seed).random(len(df))
+        rows = np.flatnonzero(valid)
+        order = rows[np.argsort(self.strata[rows] + u[rows])]
+        starts = np.r_[0, np.cumsum(self.sizes)[:-1]]
+        self.rank = np.full(len(df), np.iinfo(np.int64).max, dtype=np.int64)
+        self.rank[order] = np.arange(len(rows)) - starts[self.strata[order]]
+
+    def sample(self, fraction):
+        """
+        Returns:
+            Tuple[ndarray, ndarray]: lignes échantillonnées, taille d'échantillon
+            n_h de chaque strate
+        """
+        n_h = np.minimum(
+            self.sizes,
+            np.maximum(np.ceil(fraction * self.sizes), self.min_per_stratum),
+        ).astype(np.int64)
+        return np.flatnonzero(self.rank < n_h[self.strata]), n_h
+
+
+def estimate_totals(strata, values, domains, sizes, n_h):
+    """
+    Totaux estimés par domaine et demi-largeur de l'intervalle à 95 %.
+
+    Args:
+        strata (ndarray): strate de chaque ligne échantillonnée
+        values (ndarray): valeur de chaque ligne échantillonnée
+        domains (ndarray): domaine (code >= 0) de chaque ligne échantillonnée
+        sizes, n_h (ndarray): taille de chaque strate et de son échantillon
+
+    Returns:
+        Tuple[ndarray, ndarray, ndarray]: codes des domaines présents,
+        totaux estimés, erreurs
+    """
+    # Sommes par (strate, domaine) : z = y si la ligne est du domaine, 0 sinon
+    pairs, pair_index = np.unique(
+        np.stack([domains, strata]), axis=1, return_inverse=True
+    )
+    pair_index = pair_index.ravel()
+    s1 = np.bincount(pair_index, weights=values)
+    s2 = np.bincount(pair_index, weights=values**2)
+    domain, h = pairs
+    N, n = sizes[h].astype(float), n_h[h].astype(float)
+
+    mean = s1 / n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = np.where(n > 1, (s2 - n * mean**2) / (n - 1), 0.0)
+    contrib_total = N * mean
+    contrib_var = N**2 * (1 - n / N) * np.maximum(var, 0) / n
+
+    codes, inverse = np.unique(domain, return_inverse=True)
+    totals = np.bincount(inverse, weights=contrib_total)
+    errors = Z_95 * np.sqrt(np.bincount(inverse, weights=contrib_var))
+    return codes, totals, errors
+
+
+@stage("estimate_seasonality")
+def estimate_seasonality(sampler, selected_families, fraction):
+    """
+    `compute_seasonality` estimé sur l'échantillon `fraction`.
+
+    Returns:
+        DataFrame: colonnes ['month', 'family', 'quantity', 'quantity_err']
+    """
+    rows, n_h = sampler.sample(fraction)
+    selected = np.flatnonzero(sampler.families.isin(selected_families))
+    rows = rows[np.isin(sampler.family_codes[rows], selected)]
+    # Date manquante (code -1) : hors des domaines mois, comme dans le calcul exact
+    rows = rows[sampler.day_codes[rows] >= 0]
+
+    month_codes, months = pd.factorize(sampler.days.to_period("M"), sort=True)
+    n_months = len(months)
+    day = sampler.day_codes[rows]
+    domains = sampler.family_codes[rows] * n_months + month_codes[day]
+    values = np.nan_to_num(sampler.df["quantity"].to_numpy(dtype=float)[rows])
+    codes, totals, errors = estimate_totals(
+        sampler.strata[rows], values, domains, sampler.sizes, n_h
+    )
+
+    result = pd.DataFrame(
+        {
+            "month": months[codes % n_months].astype(str),
+            "family": sampler.families[codes // n_months],
+            "quantity": totals,
+            "quantity_err": errors,
+        }
+    )
+    return result.sort_values(["month", "family"], ignore_index=True)
+
+
+@stage("estimate_family_distribution")
+def estimate_family_distribution(sampler, selected_families, fraction):
+    """
+    `compute_family_distribution` estimé sur l'échantillon `fraction`.
+
+    Returns:
+        DataFrame: colonnes ['family', 'product_label', 'quantity', 'quantity_err']
+    """
+    rows, n_h = sampler.sample(fraction)
+    selected = np.flatnonzero(sampler.families.isin(selected_families))
+    rows = rows[np.isin(sampler.family_codes[rows], selected)]
+
+    product_codes, products = pd.factorize(sampler.df["product_label"].iloc[rows])
+    # Produit manquant : ignoré, comme dans le groupby exact
+    rows, product_codes = rows[product_codes >= 0], product_codes[product_codes >= 0]
+    n_products = len(products)
+    domains = sampler.family_codes[rows] * n_products + product_codes
+    values = np.nan_to_num(sampler.df["quantity"].to_numpy(dtype=float)[rows])
+    codes, totals, errors = estimate_totals(
+        sampler.strata[rows], values, domains, sampler.sizes, n_h
+    )
+
+    result = pd.DataFrame(
+        {
+            "family": sampler.families[codes // n_products],
+            "product_label": products[codes % n_products],
+            "quantity": totals,
+            "quantity_err": errors,
+        }
+    )
+    return result.sort_values(["family", "product_label"], ignore_index=True)
+
+
+class BasketSampler:
+    """Échantillons de paniers (client + date) entiers, tirés par Bernoulli."""
+
+    def __init__(self, df, seed=SEED):
+        self.df = df
+        basket = df.groupby(["client_id", "date"]).ngroup().to_numpy(dtype=float)
+        valid = ~np.isnan(basket)
+        codes = np.where(valid, basket, 0).astype(np.int64)
+        u = np.random.default_rng(seed).random(int(codes.max(initial=0)) + 1)
+        # Clé manquante : panier jamais tiré, comme dans le groupby exact
+        self.u = np.where(valid, u[codes], np.inf)
+
+    def sample(self, fraction, rows=None):
+        """Lignes des paniers tirés (parmi `rows` si fourni)."""
+        mask = self.u < fraction
+        if rows is not None:
+            return rows[mask[rows]]
+        return np.flatnonzero(mask)
+
+
+@stage("estimate_graph_cooccurrence")
+def estimate_graph_cooccurrence(sampler, fraction, min_edge_weight=2, rows=None):
+    """
+    `build_graph_cooccurrence` sur un échantillon de paniers : poids des
+    arêtes estimés (c / f) avec leur erreur (attribut 'weight_err').
+    """
+    # networkx (via src.graphes) n'est importé que pour le graphe de co-achats
+    import networkx as nx
+
+    from src.graphes import build_graph_cooccurrence
+
+    sample = sampler.df.iloc[sampler.sample(fraction, rows)]
+    counts = build_graph_cooccurrence(sample, min_edge_weight=1)
+
+    G = nx.Graph()
+    for u, v, data in counts.edges(data=True):
+        weight = data["weight"] / fraction
+        if weight >= min_edge_weight:
+            error = Z_95 * np.sqrt(data["weight"] * (1 - fraction)) / fraction
+            G.add_edge(u, v, weight=weight, weight_err=error)
+    return G
+
+
+class ProgressiveResult:
+    """
+    Résultat calculé par niveaux : le premier tout de suite, les suivants
+    (échantillons plus grands, puis exact) dans un thread d'arrière-plan.
+
+    Args:
+        steps (list): [(fraction, fonction sans argument)], fraction None
+            pour le calcul exact (dernier niveau)
+    """
+
+    def __init__(self, steps):
+        self._lock = threading.Lock()
+        self._steps = list(steps)
+        fraction, fn = self._steps[0]
+        self._latest = (fn(), fraction)
+        self.error = None
+        self._thread = threading.Thread(target=self._refine, daemon=True)
+        self._thread.start()
+
+    def _refine(self):
+        try:
+            for fraction, fn in self._steps[1:]:
+                value = fn()
+                with self._lock:
+                    self._latest = (value, fraction)
+        except Exception as exc:  # le dernier niveau calculé reste affiché
+            self.error = exc
+
+    @property
+    def done(self):
+        return self._latest[1] is None
+
+    def latest(self):
+        """(résultat, fraction) du niveau le plus fin disponible ; fraction None = exact."""
+        with self._lock:
+            return self._latest
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.latest()
+
+
+def progressive_seasonality(sampler, selected_families, fractions=FRACTIONS):
+    steps = [
+        (f, lambda f=f: estimate_seasonality(sampler, selected_families, f))
+        for f in fractions
+    ]
+    steps.append((None, lambda: compute_seasonality(sampler.df, selected_families)))
+    return ProgressiveResult(steps)
+
+
+def progressive_family_distribution(sampler, selected_families, fractions=FRACTIONS):
+    steps = [
+        (f, lambda f=f: estimate_family_distribution(sampler, selected_families, f))
+        for f in fractions
+    ]
+    steps.append(
+        (None, lambda: compute_family_distribution(sampler.df, selected_families))
+    )
+    return ProgressiveResult(steps)
+
+
+def progressive_cooccurrence(sampler, rows, min_edge_weight=2, fractions=FRACTIONS):
+    """Graphe de co-achats des lignes `rows` (ex. produits les plus vendus)."""
+    from src.graphes import build_graph_cooccurrence
+
+    steps = [
+        (f, lambda f=f: estimate_graph_cooccurrence(sampler, f, min_edge_weight, rows))
+        for f in fractions
+    ]
+    steps.append(
+        (
+            None,
+            lambda: build_graph_cooccurrence(
+                sampler.df.iloc[rows], min_edge_weight=min_edge_weight
+            ),
+        )
+    )
+    return ProgressiveResult(steps)
@@ -0,0 +1,119 @@
+"""
+Backend SQL embarqué (DuckDB) pour les agrégations.
+
+Les filtres et les group-by sont exécutés directement sur les fichiers
+(CSV ou Parquet) par un moteur colonnaire en mémoire : seul le résultat
+agrégé est renvoyé à pandas, avec le même schéma que les fonctions pandas
+de `src.analysis` et `src.modeling.prepare_aggregated`.
+"""
+
+import os
+
+
+def _connect():
+    try:
+        import duckdb
+    except ImportError as exc:
+        raise ImportError(
+            "Le backend SQL nécessite le paquet 'duckdb' (pip install duckdb)."
+        ) from exc
+    return duckdb.connect()
+
+
+def _scan(path):
+    """Expression FROM lisant directement le fichier source."""
+    path = os.fspath(path).replace("'", "''")
+    if path.endswith(".parquet"):
+        return f"read_parquet('{path}')"
+    return f"read_csv_auto('{path}')"
+
+
+def _ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _query(sql, params=None):
+    con = _connect()
+    try:
+        return con.execute(sql, params or []).df()
+    finally:
+        con.close()
+
+
+def compute_seasonality_sql(path, selected_families):
+    """Équivalent SQL de `compute_seasonality`, lu depuis le fichier `path`."""
+    sql = f"""
+        SELECT strftime(CAST(date AS DATE), '%Y-%m') AS month,
+               family,
+               CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM {_scan(path)}
+        WHERE list_contains(?, family) AND date IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """
+    return _query(sql, [list(selected_families)])
+
+
+def compute_family_distribution_sql(path, selected_families):
+    """Équivalent SQL de `compute_family_distribution`."""
+    sql = f"""
+        SELECT family, product_label, CAST(SUM(quantity) AS BIGINT) AS quantity
+        FROM {_scan(path)}
+        WHERE list_contains(?, family) AND product_label IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """
+    return _query(sql, [list(selected_families)])
+
+
+def prepare_aggregated_sql(
+    path,
+    date_col="date",
+    family_col="family",
+    quantity_col="quantity",
+    families=None,
+):
+    """
+    Équivalent SQL de `prepare_aggregated` : agrégation hebdomadaire par famille.
+
+    Args:
+        path (str): fichier de transactions (CSV ou Parquet)
+        families (list): si fourni, filtre poussé au moteur avant l'agrégation
+    """
+    date, family, quantity = _ident(date_col), _ident(family_col), _ident(quantity_col)
+    where = f"{date} IS NOT NULL AND {family} IS NOT NULL"
+    params = []
+    if families is not None:
+        where += f" AND list_contains(?, {family})"
+        params.append(list(families))
+
+    sql = f"""
+        WITH weekly AS (
+            SELECT *,
+                   date_trunc('week', CAST({date} AS TIMESTAMP)) AS week_start
+            FROM {_scan(path)}
+            WHERE {where}
+        )
+        SELECT {family},
+               isoyear(week_start) AS year,
+               month(week_start) AS month,
+               week(week_start) AS week,
+               week_start,
+               AVG(price_initial) AS price_initial,
+               AVG(price_sold) AS price_sold,
+               SUM(revenue) AS revenue,
+               SUM(discount_amount) AS discount_amount,
+               CAST(SUM({quantity}) AS BIGINT) AS {quantity}
+        FROM weekly
+        GROUP BY ALL
+        ORDER BY 1, 2, 3, 4, 5
+    """
+    weekly_sales = _query(sql, params)
+
+    # Mêmes types que la version pandas (isocalendar -> UInt32)
+    weekly_sales = weekly_sales.astype(
+        {"year": "UInt32", "month": "int32", "week": "UInt32"}
+    )
+    weekly_sales["week_start"] = weekly_sales["week_start"].astype("datetime64[ns]")
+
+    return weekly_sales.rename(columns={"week_start": "date"})